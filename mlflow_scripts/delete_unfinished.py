@@ -1,30 +1,27 @@
-import mlflow
-
-
-# Find existing runs
-from tqdm import tqdm
-
-from src.global_config import GlobalConfig
+from src.global_config import get_config, set_experiment
+from src.utils.mlflow.load_runs import load_runs_lite
+from src.utils.mlflow.unfinished import GHOST_FILTER, UNFINISHED_FILTER, delete_runs
 
 
 def delete_unfinished_experiments():
     """
     Find all unfinished experiments (with n_infected != 0) and delete them.
+    Also sweeps runs that crashed before logging any metric, which the
+    metric filter cannot match.
 
     :return: None
     """
-    print('Loading experiments ...')
-    mlflow.set_experiment(GlobalConfig().experiment_name)
-    df = mlflow.search_runs(experiment_ids=GlobalConfig().experiment_id)
-    print('... found {} experiments.'.format(len(df)))
+    set_experiment(get_config().experiment_name)
+
+    # Filter server-side, so only runs that will actually be deleted are transferred
+    unfinished_df = load_runs_lite(fields=['run_id'], filter_string=UNFINISHED_FILTER)
+    ghost_df = load_runs_lite(fields=['run_id'], filter_string=GHOST_FILTER)
 
-    # Filter to keep only those that were not completed
-    df = df[df['metrics.percentage_infected'] != 0.0]
+    run_ids = sorted(set(unfinished_df['run_id']) | set(ghost_df['run_id']))
 
     # Delete the selected experiments
-    print('There are {} experiments to be deleted'.format(len(df)))
-    for run_id in tqdm(df['run_id']):
-        mlflow.delete_run(run_id=run_id)
+    print('There are {} experiments to be deleted'.format(len(run_ids)))
+    delete_runs(run_ids)
 
 
 if __name__ == "__main__":
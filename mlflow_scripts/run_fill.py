@@ -1,58 +1,115 @@
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 
+import numpy as np
 from tqdm import tqdm
 
-from src.global_config import GlobalConfig
+from src.global_config import get_config, set_experiment
 from src.utils.mlflow.fill_out import fill_out_experiment
 from src.utils.mlflow.unfinished import ignore_and_delete_unfinished
 from src.world.callbacks.mlflow import MLFlowCallback
-from src.world.callbacks.snapshot_history import SnapshotHistoryCallback
 from src.world.network.rectilinear import Rectilinear2DNetwork
+from src.world.simulation.rng import seed_rng
 
-mlflow_callback = MLFlowCallback()
-video_callback = SnapshotHistoryCallback()
-config = GlobalConfig(filename='config.yml')
-
-while True:
-
-    # Decide what next experiments to run
-    new_parameters_df = fill_out_experiment(
-        parameter_grid=GlobalConfig().parameter_grid,
-        rounding=GlobalConfig().runs_per_batch,
-        ignore_rows=ignore_and_delete_unfinished,
-        maximum_runs=GlobalConfig().maximum_runs
-    )
-
-    if len(new_parameters_df) == 0:
-        print('Finished running all experiments.')
-        break
-
-    # Sort by size so that we recreate the network fewer times
-    new_parameters_df = new_parameters_df.sort_values('metrics.SIZE')
-    n_total = sum(new_parameters_df.Count)
-
-    print('\nStarting to run {} simulations\n'.format(n_total))
-    start_time = time.time()
-    my_simulation = None
-
-    # TODO use multi processing to do several at once
-    with tqdm(total=n_total) as progress_bar:
-        for index, params in new_parameters_df.iterrows():
-            progress_bar.set_description('Simulation {}'.format(params.drop(columns=['Count']).to_dict()))
-
-            alpha, beta = params['metrics.ALPHA'], params['metrics.BETA']
-            size, count = int(params['metrics.SIZE']), int(params['Count'])
-
-            # Update network object with parameters (and, if needed, new size)
-            if my_simulation is None or size != my_simulation.n_x:
-                my_simulation = Rectilinear2DNetwork(shape=(size, size))
-            my_simulation.update_disease_type(alpha=alpha, beta=beta)
-
-            # Run several repeats
-            for repeat_idx in range(count):
-                progress_bar.update(1)
-                my_simulation.start_infection_at_center()
-                my_simulation.run(callback=mlflow_callback)
-                my_simulation.reset()
-
-    print('   ... took {} seconds'.format(time.time() - start_time))
+# Per-worker state, created once by init_worker and reused across tasks
+_worker_networks = {}
+_worker_callback = None
+_completed_tasks = set()
+
+
+def init_worker():
+    """
+    Initialise a worker process.
+    Sets the mlflow experiment once per worker, and creates one reusable callback.
+
+    :return: None
+    """
+    global _worker_callback
+    set_experiment(get_config().experiment_name)
+    _worker_callback = MLFlowCallback()
+
+
+def run_one(task: Tuple[float, float, int, int]):
+    """
+    Run a single simulation in a worker process.
+    Reuses the worker's network object when the size is unchanged.
+
+    :param task: (tuple) alpha, beta, size and random seed for one simulation
+    :return: None
+    """
+
+    # An identical (alpha, beta, size, seed) tuple reproduces the exact same
+    # trajectory, so re-running it would only duplicate the stored results
+    if task in _completed_tasks:
+        return
+
+    alpha, beta, size, seed = task
+    np.random.seed(seed)
+    seed_rng(seed)
+
+    # Pool one network per size, so repeated sizes always reuse the same object
+    network = _worker_networks.get(size)
+    if network is None:
+        network = _worker_networks[size] = Rectilinear2DNetwork(shape=(size, size))
+
+    network.update_disease_type(alpha=alpha, beta=beta)
+    network.start_infection_at_center()
+    network.run(callback=_worker_callback)
+    network.reset()
+
+    _completed_tasks.add(task)
+
+
+def build_tasks(new_parameters_df) -> List[Tuple[float, float, int, int]]:
+    """
+    Flatten the required-runs DataFrame into one task tuple per simulation.
+
+    :param new_parameters_df: (DataFrame) parameter rows with Count column
+    :return: (list of tuples) one (alpha, beta, size, seed) tuple per simulation
+    """
+    # Iterate a plain ndarray; iterrows builds a fresh Series per row
+    rows = new_parameters_df[['metrics.ALPHA', 'metrics.BETA', 'metrics.SIZE', 'Count']].to_numpy()
+
+    tasks = []
+    for alpha, beta, size, count in rows:
+        for repeat_idx in range(int(count)):
+            seed = int(np.random.randint(0, int(2**32) - 1))
+            tasks.append((alpha, beta, int(size), seed))
+    return tasks
+
+
+if __name__ == '__main__':
+
+    n_workers = os.cpu_count()
+    cfg = get_config()
+
+    while True:
+
+        # Decide what next experiments to run
+        new_parameters_df = fill_out_experiment(
+            parameter_grid=cfg.parameter_grid,
+            rounding=cfg.runs_per_batch,
+            ignore_rows=ignore_and_delete_unfinished,
+            maximum_runs=cfg.maximum_runs
+        )
+
+        if len(new_parameters_df) == 0:
+            print('Finished running all experiments.')
+            break
+
+        # Sort by size so that each worker recreates its network fewer times
+        new_parameters_df = new_parameters_df.sort_values('metrics.SIZE')
+        tasks = build_tasks(new_parameters_df)
+
+        print('\nStarting to run {} simulations on {} workers\n'.format(len(tasks), n_workers))
+        start_time = time.time()
+
+        chunksize = max(1, len(tasks) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker) as executor:
+            results = executor.map(run_one, tasks, chunksize=chunksize)
+            for _ in tqdm(results, total=len(tasks)):
+                pass
+
+        print('   ... took {} seconds'.format(time.time() - start_time))
@@ -2,10 +2,9 @@ import itertools
 import time
 from argparse import ArgumentParser
 
-import mlflow
 from tqdm import tqdm
 
-from src.global_config import GlobalConfig
+from src.global_config import get_config, set_experiment
 from src.utils.argparser.linspacer import linspacer
 from src.world.callbacks.mlflow import MLFlowCallback
 from src.world.network.rectilinear import Rectilinear2DNetwork
@@ -16,8 +15,8 @@ parser.add_argument('-alphas', nargs='+', help='Alpha values (min, max, [count])
 parser.add_argument('-betas', nargs='+', help='Beta values (min, max, [count])', **linspacer(0, 0, 1))
 args = parser.parse_args()
 
+set_experiment(get_config().experiment_name)
 mlflow_callback = MLFlowCallback()
-mlflow.set_experiment(GlobalConfig().experiment_name)
 
 
 my_simulation = Rectilinear2DNetwork(shape=(args.size, args.size))
@@ -1,16 +1,14 @@
-import mlflow
-
-from src.global_config import GlobalConfig
+from src.global_config import get_config, set_experiment
 from src.utils.mlflow.load_runs import load_runs
 from src.utils.mlflow.vs_parameters import HeatmapTypes, plot_vs_parameters
 
-mlflow.set_experiment(GlobalConfig().experiment_name)
+set_experiment(get_config().experiment_name)
 
-runs_df = load_runs(cached=False)
+runs_df = load_runs(cached=True)
 
 plot_vs_parameters(
     runs_df=runs_df,
-    parameter_grid=GlobalConfig().parameter_grid,
+    parameter_grid=get_config().parameter_grid,
     type=HeatmapTypes.Epidemics1D,
 )
 
@@ -18,6 +16,6 @@ plot_vs_parameters(
 # for type in HeatmapTypes.all():
 #     plot_parameters_heatmap(
 #         runs_df=runs_df,
-#         parameter_grid=GlobalConfig().parameter_grid,
+#         parameter_grid=get_config().parameter_grid,
 #         type=type,
 #     )
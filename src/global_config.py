@@ -1,71 +1,129 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, Union, List
 
 import mlflow
 import numpy as np
 import yaml
 
-from src.utils.singleton import Singleton
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 
 class GlobalConfigError(BaseException):
     pass
 
 
-class GlobalConfig(metaclass=Singleton):
+_ARANGE_RE = re.compile(r'arange\(\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)\s*\)')
+
+_EXPERIMENT_CACHE = {}
+
+
+def set_experiment(experiment_name: str):
+    """
+    Set the mlflow experiment, caching the Experiment object per name so
+    repeated calls cost no further round trips to the tracking server.
+
+    :param experiment_name: (str) name of the mlflow experiment
+    :return: (Experiment) the active mlflow experiment
+    """
+    if experiment_name not in _EXPERIMENT_CACHE:
+        # Recent mlflow returns the Experiment from set_experiment directly;
+        # fall back to a lookup for versions that return None
+        experiment = mlflow.set_experiment(experiment_name)
+        if experiment is None:
+            experiment = mlflow.get_experiment_by_name(experiment_name)
+        _EXPERIMENT_CACHE[experiment_name] = experiment
+    return _EXPERIMENT_CACHE[experiment_name]
+
+
+@dataclass(frozen=True)
+class Config:
     """
-    Class to handle global config details.
+    Immutable global config values, loaded once from the config file.
+
+    Attributes:
+        parameter_grid: (dict) parameter values to search over
+        experiment_name: (str) name of the mlflow experiment
+        experiment_id: (str) id of the mlflow experiment
+        maximum_runs: (int) maximum number of experiments per combination
+        runs_per_batch: (int) batch size for runs
     """
-    def __init__(self, filename: str = 'config.yml'):
-        config_dict = self.load_config(filename)
-        self.parameter_grid = GlobalConfig.parse_param_grid(config_dict)
-        self.experiment_name = config_dict.pop('experiment_name')
-        self.maximum_runs = config_dict.pop('maximum_runs')
-        self.runs_per_batch = config_dict.pop('runs_per_batch')
-
-        self.check_unused_keys(config_dict)
-
-        mlflow.set_experiment(self.experiment_name)
-        self.experiment = mlflow.get_experiment_by_name(self.experiment_name)
-        self.experiment_id = self.experiment._experiment_id
-
-    @staticmethod
-    def load_config(config_file: str) -> Dict:
-        with open(config_file, 'r') as stream:
-            return yaml.load(stream)
-
-    @staticmethod
-    def parse_param_grid(config_dict):
-        parameter_grid = config_dict.pop('parameter_grid')
-        return {
-            key: GlobalConfig.expand_parameter_grid_axis(value) for key, value in parameter_grid.items()
-        }
-
-    @staticmethod
-    def expand_parameter_grid_axis(values: Union[str, List]) -> List:
-        """
-        Convert config string to list of values for parameter axis.
-
-        :param values:
-        :return:
-        """
-
-        if isinstance(values, list):
-            return values
-
-        if isinstance(values, str):
-
-            if values.startswith('arange'):
-                parts_str = values.replace('arange', '')[1:-1]
-                min, max, step = map(float, parts_str.split(', '))
-                return [np.round(value, decimals=2) for value in np.arange(min, max, step)]
+    parameter_grid: Dict[str, List]
+    experiment_name: str
+    experiment_id: str
+    maximum_runs: int
+    runs_per_batch: int
+
+
+@lru_cache(maxsize=None)
+def get_config(filename: str = 'config.yml') -> Config:
+    """
+    Load the global config, cached so the file and mlflow experiment
+    are only resolved once per process.
+
+    :param filename: (str) name of config file to load
+    :return: (Config) frozen config values
+    """
+    config_dict = load_config(filename)
+    parameter_grid = parse_param_grid(config_dict)
+    experiment_name = config_dict.pop('experiment_name')
+    maximum_runs = config_dict.pop('maximum_runs')
+    runs_per_batch = config_dict.pop('runs_per_batch')
+
+    check_unused_keys(config_dict)
+
+    experiment = set_experiment(experiment_name)
+
+    return Config(
+        parameter_grid=parameter_grid,
+        experiment_name=experiment_name,
+        experiment_id=experiment.experiment_id,
+        maximum_runs=maximum_runs,
+        runs_per_batch=runs_per_batch,
+    )
+
 
+def load_config(config_file: str) -> Dict:
+    with open(config_file, 'r') as stream:
+        return yaml.load(stream, Loader=_YamlLoader)
+
+
+def parse_param_grid(config_dict):
+    parameter_grid = config_dict.pop('parameter_grid')
+    return {
+        key: expand_parameter_grid_axis(value) for key, value in parameter_grid.items()
+    }
+
+
+def expand_parameter_grid_axis(values: Union[str, List]) -> List:
+    """
+    Convert config string to list of values for parameter axis.
+
+    :param values:
+    :return:
+    """
+
+    if isinstance(values, list):
+        return values
+
+    if isinstance(values, str):
+
+        match = _ARANGE_RE.match(values)
+        if match:
+            min, max, step = map(float, match.groups())
+            return np.round(np.arange(min, max, step), decimals=2).tolist()
+
+    raise GlobalConfigError(
+        'Unable to parse parameter axis values: {}'.format(values)
+    )
+
+
+def check_unused_keys(config_dict):
+    if len(config_dict) > 0:
         raise GlobalConfigError(
-            'Unable to parse parameter axis values: {}'.format(values)
+            'Config file contains unhandled keys: {}'.format(list(config_dict.keys()))
         )
-
-    @staticmethod
-    def check_unused_keys(config_dict):
-        if len(config_dict) > 0:
-            raise GlobalConfigError(
-                'Config file contains unhandled keys: {}'.format(list(config_dict.keys()))
-            )
@@ -14,8 +14,13 @@ def linspacer(min: Union[float, int] = 0, max: Union[float, int] = 1, count: int
     :return: (dict) to be passed to parser using parser.add_argument(**linspacer())
     """
     def linspace_converter(value_str: str) -> np.ndarray:
-        value_iter = iter(value_str.split(' '))
-        return np.linspace(next(value_iter, min), next(value_iter, max), next(value_iter, count))
+        # Parse all values in one C-level pass; the old iterator version
+        # passed raw strings straight into np.linspace for supplied values
+        parts = np.fromstring(value_str, sep=' ', dtype=float)
+        lo = parts[0] if parts.size > 0 else min
+        hi = parts[1] if parts.size > 1 else max
+        n = int(parts[2]) if parts.size > 2 else count
+        return np.linspace(lo, hi, n)
     return {
         'type': linspace_converter,
         'default': np.linspace(min, max, count)
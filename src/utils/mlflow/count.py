@@ -2,7 +2,7 @@ from typing import List, Callable
 
 from pandas import DataFrame
 
-from src.utils.mlflow.load_runs import load_runs
+from src.utils.mlflow.load_runs import load_runs_lite
 
 
 def parameter_run_counts(parameter_names: List[str], ignore_rows: Callable[[DataFrame], DataFrame] = None,
@@ -17,7 +17,8 @@ def parameter_run_counts(parameter_names: List[str], ignore_rows: Callable[[Data
     """
 
     if runs_df is None:
-        runs_df = load_runs()
+        # Only the grouping columns are needed, plus the columns used for filtering
+        runs_df = load_runs_lite(fields=[*parameter_names, 'run_id', 'metrics.percentage_infected'])
 
     columns = [*parameter_names, 'run_id']
 
@@ -34,6 +35,11 @@ def parameter_run_counts(parameter_names: List[str], ignore_rows: Callable[[Data
     if ignore_rows:
         runs_df = ignore_rows(runs_df)
 
-    runs_df = runs_df.groupby(parameter_names).count()
-    runs_df = runs_df.reset_index()[columns].rename(columns={'run_id': 'Count'})
-    return runs_df
+    # Categorical keys group on int codes instead of float hashes; size() scans
+    # a single column and sort=False skips the group-key sort
+    original_dtypes = runs_df[parameter_names].dtypes
+    runs_df = runs_df.copy()
+    runs_df[parameter_names] = runs_df[parameter_names].astype('category')
+    counts_df = runs_df.groupby(parameter_names, observed=True, sort=False).size().reset_index(name='Count')
+    counts_df[parameter_names] = counts_df[parameter_names].astype(original_dtypes)
+    return counts_df
@@ -1,7 +1,6 @@
-import itertools
 from typing import Dict, List
 
-from pandas import DataFrame
+from pandas import DataFrame, Index, MultiIndex
 
 
 def pad_for_parameter_grid(runs_df: DataFrame, parameter_grid: Dict[str, List]) -> DataFrame:
@@ -13,13 +12,12 @@ def pad_for_parameter_grid(runs_df: DataFrame, parameter_grid: Dict[str, List])
     :return: (DataFrame) new DataFrame with extra rows added for missing parameter combinations
     """
     columns, values = map(list, zip(*parameter_grid.items()))
-    grid_df = runs_df.set_index(columns)
 
-    # Handle 1D case differently
+    # MultiIndex.from_product avoids materialising the full grid as Python tuples
     if len(values) == 1:
-        new_index_values = values[0]
+        grid_index = Index(values[0], name=columns[0])
     else:
-        new_index_values = list(itertools.product(*values))
+        grid_index = MultiIndex.from_product(values, names=columns)
 
-    grid_df = grid_df.reindex(new_index_values)
+    grid_df = runs_df.set_index(columns).reindex(grid_index)
     return grid_df.reset_index()
@@ -1,32 +1,165 @@
+import hashlib
 import os
+from functools import lru_cache
+from typing import List
 
 import mlflow
-from pandas import DataFrame, read_csv
+from mlflow.tracking import MlflowClient
+from pandas import DataFrame, read_feather
 
-from src.global_config import GlobalConfig
+from src.global_config import get_config
 
+CACHE_DIR = os.path.expanduser('~/.cache/synergy')
 
-def load_runs(cached: bool = False) -> DataFrame:
+
+def experiment_fingerprint() -> str:
+    """
+    Cheaply fingerprint the current state of the experiment.
+    Probes the latest end time with a single ordered search and counts runs by
+    paginating the search API, so the fingerprint changes whenever runs are
+    added, deleted or finished.
+
+    :return: (str) fingerprint hash of the experiment state
     """
-    Load experiment runs, using caching for faster loading while testing.
+    client = MlflowClient()
+    experiment_id = get_config().experiment_id
+
+    latest = client.search_runs(
+        experiment_ids=[experiment_id],
+        max_results=1,
+        order_by=['attributes.end_time DESC']
+    )
+    latest_end_time = (latest[0].info.end_time or 0) if latest else 0
+
+    key = '{}-{}-{}'.format(experiment_id, latest_end_time, _count_runs(client, experiment_id))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _count_runs(client: MlflowClient, experiment_id: str) -> int:
+    """
+    Count all runs in an experiment, paginating the search API.
+
+    :param client: (MlflowClient) client to search with
+    :param experiment_id: (str) id of the experiment
+    :return: (int) total number of runs
+    """
+    n_runs = 0
+    page_token = None
+    while True:
+        page = client.search_runs(
+            experiment_ids=[experiment_id],
+            max_results=1000,
+            page_token=page_token
+        )
+        n_runs += len(page)
+        page_token = page.token
+        if not page_token:
+            break
+    return n_runs
+
+
+def load_runs(cached: bool = True) -> DataFrame:
+    """
+    Load experiment runs, using a fingerprint-keyed cache for faster loading.
+    The cache key tracks the experiment state, so stale results are never served.
 
     :param cached: (bool) if True, use caching
     :return: (DataFrame) experiment runs
     """
 
-    if cached and os.path.exists('existing_df.csv'):
-        print('WARNING: getting CACHED existing experiments results ...')
-        runs_df = read_csv('existing_df.csv')
+    if cached:
+        return _load_runs_fingerprinted(experiment_fingerprint())
+
+    return _search_runs()
+
+
+@lru_cache(maxsize=None)
+def _load_runs_fingerprinted(fingerprint: str) -> DataFrame:
+    """
+    Load experiment runs for a given experiment fingerprint.
+    Serves repeated in-process calls from memory, and repeated cross-process
+    calls from an on-disk cache file keyed by the fingerprint.
+
+    :param fingerprint: (str) fingerprint of the experiment state
+    :return: (DataFrame) experiment runs
+    """
+
+    # Feather loads at memory-bandwidth speed and preserves dtypes, so cached
+    # frames come back with real datetime columns rather than strings
+    cache_file = os.path.join(CACHE_DIR, 'runs_{}.feather'.format(fingerprint))
+
+    if os.path.exists(cache_file):
+        print('Getting cached experiments results ...')
+        runs_df = read_feather(cache_file)
         print('... found {} existing experiments.'.format(len(runs_df)))
         return runs_df
 
-    else:
-        print('Getting existing experiments results ...')
-        runs_df = mlflow.search_runs(experiment_ids=GlobalConfig().experiment_id)
-        print('... found {} existing experiments.'.format(len(runs_df)))
+    runs_df = _search_runs()
 
-        if cached:
-            print('WARNING: saving existing experiments results to cached file')
-            runs_df.to_csv('existing_df.csv', index=False)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    runs_df.reset_index(drop=True).to_feather(cache_file)
+    return runs_df
 
-        return runs_df
+
+def load_runs_lite(fields: List[str], filter_string: str = '') -> DataFrame:
+    """
+    Load only the requested fields for each run, skipping full-run materialisation.
+    Much faster and lighter than load_runs when only a few columns are needed.
+
+    :param fields: (list of str) columns to load (e.g. 'run_id', 'metrics.ALPHA')
+    :param filter_string: (str) mlflow search filter, applied server-side
+    :return: (DataFrame) experiment runs with only the requested columns
+    """
+
+    client = MlflowClient()
+    print('Getting existing experiments results (fields: {}) ...'.format(fields))
+
+    rows = []
+    page_token = None
+    while True:
+        page = client.search_runs(
+            experiment_ids=[get_config().experiment_id],
+            filter_string=filter_string,
+            max_results=1000,
+            page_token=page_token
+        )
+        rows.extend(_run_fields(run, fields) for run in page)
+        page_token = page.token
+        if not page_token:
+            break
+
+    print('... found {} existing experiments.'.format(len(rows)))
+    return DataFrame(rows, columns=fields)
+
+
+def _run_fields(run, fields: List[str]) -> List:
+    """
+    Extract the requested field values from a single mlflow Run entity.
+
+    :param run: (Run) mlflow run entity
+    :param fields: (list of str) columns to extract
+    :return: (list) one value per requested field
+    """
+    values = []
+    for field in fields:
+        if field.startswith('metrics.'):
+            values.append(run.data.metrics.get(field[len('metrics.'):]))
+        elif field.startswith('params.'):
+            values.append(run.data.params.get(field[len('params.'):]))
+        elif field.startswith('tags.'):
+            values.append(run.data.tags.get(field[len('tags.'):]))
+        else:
+            values.append(getattr(run.info, field, None))
+    return values
+
+
+def _search_runs() -> DataFrame:
+    """
+    Load experiment runs directly from mlflow (slow).
+
+    :return: (DataFrame) experiment runs
+    """
+    print('Getting existing experiments results ...')
+    runs_df = mlflow.search_runs(experiment_ids=get_config().experiment_id)
+    print('... found {} existing experiments.'.format(len(runs_df)))
+    return runs_df
@@ -1,9 +1,9 @@
-from datetime import timedelta
+from enum import Enum
 from typing import Dict, List, Optional, Union
 
 import matplotlib
 import numpy as np
-from pandas import to_datetime, DataFrame
+from pandas import to_datetime, DataFrame, Series
 
 from src.utils.mlflow.grid import pad_for_parameter_grid
 from src.utils.mlflow.load_runs import load_runs
@@ -11,7 +11,22 @@ from src.utils.mlflow.load_runs import load_runs
 matplotlib.use('TkAgg')
 
 
-class HeatmapTypes:
+def epoch_milliseconds(column: Series) -> np.ndarray:
+    """
+    Convert a run timestamp column to integer epoch milliseconds.
+    Only parses strings when unavoidable (e.g. columns read back from a CSV cache);
+    datetime columns are reinterpreted as integers without per-row parsing.
+
+    :param column: (Series) start_time or end_time column
+    :return: (numpy array) int64 epoch milliseconds
+    """
+    if column.dtype == object:
+        column = to_datetime(column)
+    return column.values.astype('datetime64[ms]').astype('int64')
+
+
+class HeatmapTypes(str, Enum):
+    """ Valid heatmap types; values double as runs-frame column names """
     Count = 'Count'
     TimeTaken = 'Time'
     Epidemics1D = 'metrics.is_1d_epidemic'
@@ -20,13 +35,7 @@ class HeatmapTypes:
 
     @staticmethod
     def all():
-        return [
-            HeatmapTypes.Count,
-            HeatmapTypes.TimeTaken,
-            HeatmapTypes.Epidemics1D,
-            HeatmapTypes.Epidemics2D,
-            HeatmapTypes.PercentageRemoved,
-        ]
+        return list(HeatmapTypes)
 
 
 def plot_vs_parameters(parameter_grid: Dict[str, List], type: Union[str, List[str]]= HeatmapTypes.Count,
@@ -91,29 +100,13 @@ def get_array_values(columns: List[str], values: List, type: str, runs_df: DataF
     :return: (numpy array), shape `( len(parameter_grid.values()[0]), len(parameter_grid.values()[1]) )`
     """
 
-    if type == HeatmapTypes.Count:
-        runs_df = runs_df.groupby(columns).size().reset_index()
-        runs_df = runs_df.rename(columns={0: 'Values'})
-
-    elif type == HeatmapTypes.TimeTaken:
-        runs_df['Time'] = to_datetime(runs_df['end_time']) - to_datetime(runs_df['start_time'])
+    aggregate = _AGGREGATORS.get(type)
 
-        # Any experiment that lasts > 10 mins is probably caused by laptop going to sleep
-        outlier_mask = runs_df['Time'] < timedelta(seconds=max_time)
-
-        if sum(~outlier_mask):
-            print('Dropping {} rows whose time taken are probably invalid'.format(sum(~outlier_mask)))
-            bad_runs = runs_df[~outlier_mask]
-            print(bad_runs[[*columns, 'Time']])
-            runs_df = runs_df[outlier_mask]
-
-        runs_df = runs_df.groupby(columns).Time.apply(lambda times_taken: np.mean(times_taken).total_seconds())
-        runs_df = runs_df.reset_index()
-        runs_df = runs_df.rename(columns={'Time': 'Values'})
+    if aggregate is not None:
+        runs_df = aggregate(runs_df, columns, max_time=max_time)
 
     elif type in runs_df:
-        runs_df = runs_df.groupby(columns)[type].mean().reset_index()
-        runs_df = runs_df.rename(columns={type: 'Values'})
+        runs_df = _aggregate_metric_mean(runs_df, columns, type)
 
     else:
         raise RuntimeError('No known heatmap type {}'.format(type))
@@ -123,3 +116,42 @@ def get_array_values(columns: List[str], values: List, type: str, runs_df: DataF
 
     # Convert to array and reshape to 2D
     return runs_df['Values'].values.reshape(tuple(map(len, values)))
+
+
+def _aggregate_count(runs_df: DataFrame, columns: List[str], **kwargs) -> DataFrame:
+    """ Count runs for each parameter combination. """
+    return runs_df.groupby(columns, sort=False).size().reset_index(name='Values')
+
+
+def _aggregate_time_taken(runs_df: DataFrame, columns: List[str], max_time: float = 20 * 60.0) -> DataFrame:
+    """ Mean wall-clock time of runs for each parameter combination. """
+
+    # Copy first: the caller's frame may be the shared lru-cached one,
+    # which must not grow a Time column
+    runs_df = runs_df.copy()
+
+    # Subtract as epoch milliseconds; datetime parsing per call is far slower
+    runs_df['Time'] = (epoch_milliseconds(runs_df['end_time']) -
+                       epoch_milliseconds(runs_df['start_time'])) / 1000.0
+
+    # Any experiment that lasts > 10 mins is probably caused by laptop going to sleep
+    outlier_mask = runs_df['Time'] < max_time
+
+    if sum(~outlier_mask):
+        print('Dropping {} rows whose time taken are probably invalid'.format(sum(~outlier_mask)))
+        bad_runs = runs_df[~outlier_mask]
+        print(bad_runs[[*columns, 'Time']])
+        runs_df = runs_df[outlier_mask]
+
+    return runs_df.groupby(columns, sort=False, as_index=False).agg(Values=('Time', 'mean'))
+
+
+def _aggregate_metric_mean(runs_df: DataFrame, columns: List[str], metric_column: str) -> DataFrame:
+    """ Mean of a metric column for each parameter combination. """
+    return runs_df.groupby(columns, sort=False, as_index=False).agg(Values=(metric_column, 'mean'))
+
+
+_AGGREGATORS = {
+    HeatmapTypes.Count: _aggregate_count,
+    HeatmapTypes.TimeTaken: _aggregate_time_taken,
+}
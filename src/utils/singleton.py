@@ -1,11 +0,0 @@
-
-class Singleton(type):
-    """
-    This is a class for ensuring classes are not duplicated.
-    """
-    _instances = {}
-
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
@@ -1,15 +1,19 @@
 import os
 import tempfile
+import time
 from logging import getLogger
+from typing import Dict
 
 import imageio
 import mlflow
 import numpy as np
-from mlflow import log_metric, start_run, end_run
+from mlflow import start_run, end_run
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
 
-from src.global_config import GlobalConfig
 from src.world.callbacks.base import Callback
 from src.world.network.rectilinear import EpidemicType2D
+from src.world.simulation.rng import seed_rng
 
 logger = getLogger(__name__)
 
@@ -17,64 +21,120 @@ logger = getLogger(__name__)
 class MLFlowCallback(Callback):
     """
     Callback to handle storing results in mlflow.
+    Callers are expected to have set the active mlflow experiment
+    (e.g. via src.global_config.set_experiment) before running.
 
     Attributes:
         results_dir: (str) directory in which to store results
         log_histories: (bool) also store the history of
         save_image: (bool) also save image of final state
+        flush_every: (int) how many metrics to buffer before flushing to mlflow
+        _client: (MlflowClient) reused client for batched metric logging
+        _pending: (list of Metric) metrics buffered since the last flush
     """
 
-    def __init__(self, results_dir: str = 'results', log_histories: bool = False, save_images: bool = False):
+    def __init__(self, results_dir: str = 'results', log_histories: bool = False, save_images: bool = False,
+                 flush_every: int = 100):
         self.results_dir = results_dir
         self.log_histories = log_histories
         self.save_images = save_images
-        mlflow.set_experiment(GlobalConfig().experiment_name)
+        self.flush_every = flush_every
+        self._client = MlflowClient()
+        self._pending = []
+        self._step = 0
+
+    def _buffer_metrics(self, values: Dict[str, float]):
+        """
+        Convert metric values to Metric entities and add to the pending buffer,
+        flushing once the buffer is full.
+
+        :param values: (dict) metric names to values
+        :return: None
+        """
+        timestamp = int(time.time() * 1000)
+        self._pending.extend(
+            Metric(key=key, value=value, timestamp=timestamp, step=self._step)
+            for key, value in values.items()
+        )
+        if len(self._pending) >= self.flush_every:
+            self._flush_metrics()
+
+    def _flush_metrics(self):
+        """
+        Send all pending metrics to mlflow in a single batched call.
+
+        :return: None
+        """
+        if not self._pending:
+            return
+        run_id = mlflow.active_run().info.run_id
+        self._client.log_batch(run_id=run_id, metrics=self._pending)
+        self._pending = []
 
     def on_simulation_started(self, network: 'Network'):
         start_run()
+        self._pending = []
+        self._step = 0
 
         # Choose, set, and store a random seed
         random_seed = int(np.random.randint(0, int(2**32) - 1))
         np.random.seed(random_seed)
-        log_metric("NUMPY_RANDOM_STATE", random_seed)
+        seed_rng(random_seed)
 
-        log_metric("ALPHA", network.ALPHA)
-        log_metric("BETA", network.BETA)
-        log_metric("INFECTION_TIME", network.INFECTION_TIME)
-        log_metric("SIZE", network.n_x)
+        self._buffer_metrics({
+            "NUMPY_RANDOM_STATE": random_seed,
+            "ALPHA": network.ALPHA,
+            "BETA": network.BETA,
+            "INFECTION_TIME": network.INFECTION_TIME,
+            "SIZE": network.n_x,
+        })
 
     def on_event_occurred(self, network: 'Network'):
         if self.log_histories:
-            log_metric("time", network.time)
-            log_metric("percentage_safe", network.percentage_safe)
-            log_metric("percentage_infected", network.percentage_infected)
-            log_metric("percentage_removed", network.percentage_removed)
+            self._step += 1
+            self._buffer_metrics({
+                "time": network.time,
+                "percentage_safe": network.percentage_safe,
+                "percentage_infected": network.percentage_infected,
+                "percentage_removed": network.percentage_removed,
+            })
 
     def on_simulation_finished(self, network: 'Network'):
-        log_metric("time", network.time)
-        log_metric("percentage_safe", network.percentage_safe)
-        log_metric("percentage_infected", network.percentage_infected)
-        log_metric("percentage_removed", network.percentage_removed)
-
-        log_metric("is_1d_epidemic", float(network.is_epidemic(EpidemicType2D.OneDimensionalType)))
-        log_metric("is_2d_epidemic", float(network.is_epidemic(EpidemicType2D.TwoDimensionalType)))
+        self._step += 1
+        self._buffer_metrics({
+            "time": network.time,
+            "percentage_safe": network.percentage_safe,
+            "percentage_infected": network.percentage_infected,
+            "percentage_removed": network.percentage_removed,
+            "is_1d_epidemic": float(network.is_epidemic(EpidemicType2D.OneDimensionalType)),
+            "is_2d_epidemic": float(network.is_epidemic(EpidemicType2D.TwoDimensionalType)),
+        })
+        self._flush_metrics()
 
         with tempfile.TemporaryDirectory() as tmpdirname:
             values = network.to_array()
 
-            np.save(os.path.join(tmpdirname, 'final_state.npy'), values)
-            np.save(os.path.join(tmpdirname, 'final_shader_x.npy'), network._shader_x.reshape((1, -1)))
-            np.save(os.path.join(tmpdirname, 'final_shader_y.npy'), network._shader_y.reshape((1, -1)))
+            # One compressed archive means one file write and one upload,
+            # and the mostly-zero shader arrays deflate well
+            np.savez_compressed(
+                os.path.join(tmpdirname, 'final.npz'),
+                state=values,
+                shader_x=network._shader_x.reshape((1, -1)),
+                shader_y=network._shader_y.reshape((1, -1)),
+            )
 
             if self.save_images:
                 save_array_as_image(os.path.join(tmpdirname, 'final_state.png'), values)
                 save_array_as_image(os.path.join(tmpdirname, 'final_shader_x.png'), network._shader_x.reshape((1, -1)))
                 save_array_as_image(os.path.join(tmpdirname, 'final_shader_y.png'), network._shader_y.reshape((1, -1)))
-
-            mlflow.log_artifacts(tmpdirname)
+                mlflow.log_artifacts(tmpdirname)
+            else:
+                mlflow.log_artifact(os.path.join(tmpdirname, 'final.npz'))
 
         end_run()
 
 
 def save_array_as_image(filename, array):
-    imageio.imwrite(filename, 255 * array.astype(np.uint8))
+    # Scale before casting (casting first wraps values >= 1), and keep PNG
+    # deflate cheap -- encoding time is dominated by zlib otherwise
+    imageio.imwrite(filename, (255 * array).astype(np.uint8, copy=False), compress_level=1)
@@ -1,14 +1,12 @@
-from copy import deepcopy
-from typing import List, Iterable, Optional
+import os
+import subprocess
+from typing import Optional
 
-import matplotlib.animation as animation
-import matplotlib.pyplot as plt
 import numpy as np
 from tqdm import tqdm
 
 from src.world.callbacks.base import Callback
-from src.world.cell import State
-from src.world.snapshot import Snapshot
+from src.world.cell.state import I_CODE, R_CODE
 
 s_color = [0.325, 0.718, 0.306, 1.0]
 i_color = [1.0, 0.0, 0.0, 1.0]
@@ -17,11 +15,18 @@ r_color = [0.0, 0.0, 0.0, 1.0]
 
 class SnapshotHistoryCallback(Callback):
     """
-    Callback to catch and store snapshot objects at each time step.
+    Callback to record snapshot history at each time step.
+    Snapshots are stored columnar: one growing (T, N) uint8 state matrix,
+    a (T, N) float32 matrix of infection start times and a (T,) float32 time
+    vector, instead of one Python Snapshot object per frame.
 
     Attributes:
         dt_snapshots: (float, or None) how often to take snapshots
-        _history: (list of Snapshot) snapshot histories
+        _times: (numpy array of float32) time of each snapshot
+        _states: ((T, N) numpy array of int8) state codes of each snapshot
+        _infected_times: ((T, N) numpy array of float32) infection start times (inf if never infected)
+        _locations: (list of tuples) cell locations, stored once
+        _length: (int) number of snapshots recorded
     """
 
     def __init__(self, dt_snapshots: Optional[float] = 1.0):
@@ -31,24 +36,69 @@ class SnapshotHistoryCallback(Callback):
         :param dt_snapshots: (float, or None) how often to take snapshots
         """
         self.dt_snapshots = dt_snapshots
-        self._history = []
+        self.reset()
 
     def reset(self):
         """ Reset callback to initial state """
-        self._history = []
+        self._times = None
+        self._states = None
+        self._infected_times = None
+        self._locations = None
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
 
     @property
-    def last_snapshot(self):
-        return self._history[-1] if self._history else None
+    def last_time(self) -> Optional[float]:
+        """ Time of the most recent snapshot, or None if there is none yet """
+        return float(self._times[self._length - 1]) if self._length else None
+
+    def _append(self, network: 'Network', time: float = None):
+        """
+        Append the network's current state as one snapshot row,
+        growing the storage by doubling when full.
+
+        :param network: (Network) network to snapshot
+        :param time: (float) time to record for the snapshot (default: network time)
+        :return: None
+        """
+
+        n_cells = len(network.state_arr)
+
+        if self._states is None:
+            self._locations = network.apply_map(lambda c: (c.x, c.y))
+            self._times = np.empty(64, dtype=np.float32)
+            self._states = np.empty((64, n_cells), dtype=np.int8)
+            self._infected_times = np.empty((64, n_cells), dtype=np.float32)
+
+        elif self._length == len(self._times):
+            self._times = np.concatenate([self._times, np.empty_like(self._times)])
+            self._states = np.concatenate([self._states, np.empty_like(self._states)])
+            self._infected_times = np.concatenate([self._infected_times, np.empty_like(self._infected_times)])
+
+        row = self._length
+        self._times[row] = network.time if time is None else time
+        self._states[row] = network.state_arr
+        self._infected_times[row] = network.remove_at_arr - network.INFECTION_TIME
+        self._length = row + 1
 
     def on_event_occurred(self, network: 'Network'):
-        self._history.extend(
-            recent_snapshots(
-                network=network,
-                last_snapshot=self.last_snapshot,
-                dt_snapshots=self.dt_snapshots
-            )
-        )
+
+        # Snapshot at every step
+        if self.dt_snapshots is None or self._length == 0:
+            self._append(network)
+
+        # Disease is dead -- take one final snapshot
+        elif network.extinct:
+            self._append(network, time=self.last_time + self.dt_snapshots)
+
+        # Time has advanced enough to take snapshot(s) of the current state
+        else:
+            snap_time = self.last_time
+            while snap_time + self.dt_snapshots < network.time:
+                snap_time += self.dt_snapshots
+                self._append(network, time=snap_time)
 
     def on_simulation_finished(self, network: 'Network'):
         pass
@@ -66,127 +116,98 @@ class SnapshotHistoryCallback(Callback):
         self.INFECTION_TIME = network.INFECTION_TIME
         self.reset()
 
-    def make_video(self, filename: str = "simulation.mp4", fps: int = 5, marker: str = 's', progress_bar: bool = False):
+    def make_video(self, filename: str = "simulation.mp4", fps: int = 5, marker_scale: int = None,
+                   progress_bar: bool = False):
         """
         Generate a video from a network's snapshot history.
+        Frames are rasterized directly from the columnar state arrays into
+        RGB pixels with numpy (no matplotlib) and streamed into ffmpeg.
 
         :param filename: (str) name to store video file
         :param fps: (int) frames per second
-        :param marker: (str) mpl marker type
+        :param marker_scale: (int) pixels per cell (default: sized for ~600px frames)
         :param progress_bar: (bool) show progressbar while making frames
         :return: None
         """
 
-        figsize = (8, 8)
-        marker_width = 600.0 / self.n_x
-
-        import os
         if os.path.exists(filename):
             os.remove(filename)
 
-        fig = plt.figure(figsize=figsize)
-        ax = fig.add_subplot(111)
-        ax.axis('off')
-        ax.set_aspect('equal')
-        ax.get_xaxis().set_visible(False)
-        ax.get_yaxis().set_visible(False)
-        plt.title('Simulation')
-        ax.set_xlim(-0.5, self.n_x-0.5)
-        ax.set_ylim(-0.5, self.n_y-0.5)
-
-        # im = ax.imshow(rand(300, 300), cmap='gray', interpolation='nearest')
-        # im.set_clim([0, 1])
-        # fig.set_size_inches([5, 5])
-
-        snapshot = self._history[0]
-        xs, ys = zip(*snapshot.locations)
-        states = np.array(self._history[0].states)
-        colors = np.array([s_color]*len(states))
-        scatter = plt.scatter(xs, ys, facecolors=colors, s=marker_width*marker_width, marker=marker)
-
-        plt.tight_layout()
-
-        bar = tqdm(total=len(self._history)) if progress_bar else None
-
-        def update_scatter(n: int):
-            # TODO should be handled inside the network class visualisor?
-            if progress_bar:
-                bar.set_description('Making frame {} of {}'.format(n + 1, len(self._history)))
-                bar.update()
-            snapshot = self._history[n]
-            states = np.array(snapshot.states)
-            colors = np.array([s_color]*len(states))
-
-            colors[states == State.R, :] = r_color
-
-            # Fractional red color based on how long until it dies
-            if np.sum(states == State.I) > 0:
-                time = snapshot.time
-                infected_times = snapshot.infected_times
-                infected_times = np.array(infected_times)[states == State.I]
-                ages = time - np.array(infected_times)
-                fraction_ages = 1.0 - (ages / self.INFECTION_TIME)
-                age_colours = np.array([i_color] * len(infected_times))
-                age_colours[:, :2] = np.multiply(age_colours[:, :2].T, fraction_ages).T
-                colors[states == State.I, :] = np.clip(age_colours, 0, 1)
-
-            scatter.set_facecolor(colors)
-
-            ax.set_title("Time = %.2f" % snapshot.time)
+        scale = marker_scale or max(1, 600 // max(self.n_x, self.n_y))
+        width, height = self.n_x * scale, self.n_y * scale
+        # h264 with yuv420p needs even frame dimensions
+        width += width % 2
+        height += height % 2
+
+        command = [
+            'ffmpeg', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '{}x{}'.format(width, height),
+            '-r', str(fps), '-i', '-',
+            '-an', '-vcodec', 'libx264', '-pix_fmt', 'yuv420p',
+            filename,
+        ]
+        pipe = subprocess.Popen(command, stdin=subprocess.PIPE, bufsize=1 << 20)
+
+        rows = range(self._length)
+        if progress_bar:
+            rows = tqdm(rows, desc='Making frames')
+
+        for row in rows:
+            pixels = _frame_pixels(
+                states=self._states[row],
+                time=float(self._times[row]),
+                infected_times=self._infected_times[row],
+                infection_time=self.INFECTION_TIME,
+                n_x=self.n_x, n_y=self.n_y,
+                scale=scale, width=width, height=height,
+            )
+            pipe.stdin.write(pixels.tobytes())
 
-            return scatter
+        pipe.stdin.close()
+        pipe.wait()
 
-        ani = animation.FuncAnimation(fig, update_scatter, len(self._history), interval=100.0 / fps)
-        writer = animation.writers['ffmpeg'](fps=30)
-        ani.save(filename, writer=writer, dpi=100)
+        if progress_bar:
+            print('Video saved to \'{}\''.format(filename))
 
-        if bar:
-            bar.set_description('Video saved to \'{}\''.format(filename))
-            bar.close()
+    @property
+    def n_snapshots(self) -> int:
+        """ Number of snapshots recorded so far """
+        return self._length
 
 
-def recent_snapshots(network: 'Network', last_snapshot: Snapshot, dt_snapshots: float) -> List[Snapshot]:
+def _frame_pixels(states, time, infected_times, infection_time, n_x, n_y, scale, width, height) -> np.ndarray:
     """
-    Get the snapshots since the last snapshot time.
-
-    :param network: (Network) network to get snapshots for
-    :param last_snapshot: (float) last snapshot taken
-    :param dt_snapshots: (float) time step between each snapsot; if None, take snapshot at each (uneven) time step
-    :return: (list of Snapshot) all snapshots needed since last snapshot time
+    Rasterize one snapshot into an (height, width, 3) uint8 RGB frame.
+
+    :param states: (numpy array of uint8) state code per cell
+    :param time: (float) snapshot time
+    :param infected_times: (numpy array of float32) infection start time per cell
+    :param infection_time: (float) duration of infection
+    :param n_x, n_y: (int) grid shape
+    :param scale: (int) pixels per cell
+    :param width, height: (int) output frame size (may include padding)
+    :return: (numpy array) RGB pixels for the frame
     """
 
-    # Snapshot at every step
-    if dt_snapshots is None or last_snapshot is None:
-        return [Snapshot(network)]
+    rgb = np.empty((len(states), 3), dtype=np.float32)
+    rgb[:] = s_color[:3]
+    rgb[states == R_CODE] = r_color[:3]
 
-    # Disease is dead -- take one final snapshot
-    elif network.extinct:
-        snapshot = Snapshot(network)
-        snapshot.time = last_snapshot.time + dt_snapshots
-        return [snapshot]
+    # Fractional red color based on how long until it dies
+    infected_mask = states == I_CODE
+    if infected_mask.any():
+        ages = time - infected_times[infected_mask]
+        fraction_ages = 1.0 - (ages / infection_time)
+        rgb[infected_mask] = i_color[:3]
+        rgb[infected_mask, :2] *= fraction_ages[:, None]
+        np.clip(rgb, 0, 1, out=rgb)
 
-    # Time has advanced enough to take snapshot(s)
-    elif network.time > last_snapshot.time + dt_snapshots:
-        return list(snapshots_at_intervals(network, last_snapshot, dt_snapshots))
+    # Splat cells to pixel blocks; cells are stored x-major, frames are row-major
+    image = (255 * rgb).astype(np.uint8).reshape(n_x, n_y, 3).transpose(1, 0, 2)
+    image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
 
-    else:
-        return []
+    pad_y, pad_x = height - image.shape[0], width - image.shape[1]
+    if pad_y or pad_x:
+        image = np.pad(image, ((0, pad_y), (0, pad_x), (0, 0)))
 
-
-def snapshots_at_intervals(network: 'Network', last_snapshot: Snapshot, dt_snapshots: float) \
-        -> Iterable[Snapshot]:
-    """
-    Get the list of snapshots since the last snapshot time.
-
-    :param network: (Network) network to get snapshots for
-    :param last_snapshot: (Snapshot) last snapshot taken
-    :param dt_snapshots: (float) time step between each snapsot; if None, take snapshot at each (uneven) time step
-    :return: (generator of Snapshots)
-    """
-    snapshot = Snapshot(network)
-    snap_time = last_snapshot.time
-    while snap_time + dt_snapshots < network.time:
-        snap_time += dt_snapshots
-        snapshot = deepcopy(snapshot)
-        snapshot.time = snap_time
-        yield snapshot
+    return image
@@ -1,23 +1,28 @@
-import uuid
+import itertools
 
 import numpy as np
 
-from src.error import CellError
-from src.world.cell.state import State
+from src.world.cell.state import State, STATE_CODES, CODE_STATES, S_CODE
+
+# Monotonic id source; uuid1 per cell cost a syscall for every construction
+_next_cell_id = itertools.count()
 
 
 class Cell:
     """
     Class for a cell in a network.
+    A Cell is a thin view onto its network's state arrays: the per-cell scalars
+    (state, infection rate, infected-neighbour count, removal time) live in
+    parallel numpy arrays on the Network, indexed by this cell's flat index.
 
     Attributes:
         id: (int) unique id for this cell
         x: (int) x coordinate in the world
         y: (int) y coordinate in the world TODO allow just `position`?
+        index: (int) flat index into the network's state arrays
         network: (Network) parent networ
-        _state: (State) current state (e.g. Susceptible, Infected, Removed)
-        _neighbours: (numpy array of Cells) cells connected to this one
-        _remove_at_time: (float) time at which this cell should become Removed
+        _neighbours: (list of Cells) cells connected to this one
+        _neighbour_indices: (numpy array) cached flat indices of the neighbours
 
     Methods:
         add/remove_neighbour: connect/disconnect another cell
@@ -37,16 +42,14 @@ class Cell:
         :param network: (Network) the network to which this cell belongs
         :param state: (State) starting state of the cell
         """
-        self.id = uuid.uuid1().int >> 64
+        self.id = next(_next_cell_id)
         self.x = x
         self.y = y
         self.network = network
-        self._state = state
+        self.index = None
+        self._initial_state = state
         self._neighbours = []
-        self._remove_at_time = None
-        self._n_infected_neighbours = 0
-        self._rate_of_getting_infected = 0.0
-        self._is_safe = True
+        self._neighbour_indices = None
 
     def __repr__(self) -> str:
         return "%s[%d, %d]" % (self.state, self.x, self.y)
@@ -56,15 +59,16 @@ class Cell:
 
     def reset(self):
         """
-        Reset the node to starting state. Sets all attributes to initial states.
+        Reset the node to starting state. Sets all array entries to initial states.
 
         :return: None
         """
-        self._state = State.S
-        self._remove_at_time = None
-        self._n_infected_neighbours = 0
-        self._rate_of_getting_infected = 0.0
-        self._is_safe = True
+        network = self.network
+        network.state_arr[self.index] = S_CODE
+        network.remove_at_arr[self.index] = np.inf
+        network.n_inf_arr[self.index] = 0
+        network.rate_arr[self.index] = 0.0
+        network.is_safe_arr[self.index] = True
 
     @property
     def is_safe(self) -> bool:
@@ -73,76 +77,40 @@ class Cell:
 
         :return: (bool) True iff this cell has a nearly zero rate of infection
         """
-        return self._is_safe
+        return bool(self.network.is_safe_arr[self.index])
 
     @property
     def state(self) -> State:
-        return self._state
+        return CODE_STATES[self.network.state_arr[self.index]]
 
     @state.setter
     def state(self, new_state: State):
         """
         Change the state of the cell.
-        Also triggers the network to update any lists.
+        Delegates to the network, which updates the state arrays and any lists.
 
         :param new_state: (State) new state for this Cell
         :return: None
         """
 
-        if self.state == new_state:
+        new_code = STATE_CODES.get(new_state)
+        if new_code is not None and self.network.state_arr[self.index] == new_code:
             return
 
-        old_neighbour_rates = [
-            cell.rate_of_getting_infected for cell in self._neighbours
-            if cell.state == State.S
-        ]
-
-        old_rate = self.rate_of_getting_infected
-        old_state = self.state
-        self._state = new_state
-
-        # TODO this is only for SIR model; usually need to have method for all pairs of old state and new state
-        if new_state == State.S:
-            pass
-
-        elif new_state == State.I:
-            self._remove_at_time = self.network.time + self.network.INFECTION_TIME
-            self._rate_of_getting_infected = 0
-            for neighbour in self._neighbours:
-                neighbour.n_infected_neighbours += 1
-
-        elif new_state == State.R:
-            self._remove_at_time = np.inf
-            self._rate_of_getting_infected = 0
-            for neighbour in self._neighbours:
-                neighbour.n_infected_neighbours -= 1
-
-        else:
-            raise CellError('Undefined behaviour when state changes to {}'.format(new_state))
-
-        self.network.cell_state_changed(self, old_state, new_state)
-
-        self.network.sum_events_rates = self.network.sum_events_rates + (self.rate_of_getting_infected - old_rate)
-
-        new_neighbour_rates = [
-            cell.rate_of_getting_infected for cell in self._neighbours
-            if cell.state == State.S
-        ]
-        difference_rates = sum(new - old for old, new in zip(old_neighbour_rates, new_neighbour_rates))
-        self.network.sum_events_rates = self.network.sum_events_rates + difference_rates
+        self.network.apply_state_change(self, new_state)
 
     @property
     def remove_at_time(self) -> float:
         """
         Time at which this cell should be removed.
 
-        :return: (float) removal time
+        :return: (float) removal time; inf when no removal is pending
         """
-        return self._remove_at_time
+        return self.network.remove_at_arr[self.index]
 
     @property
     def n_infected_neighbours(self):
-        return self._n_infected_neighbours
+        return int(self.network.n_inf_arr[self.index])
 
     @n_infected_neighbours.setter
     def n_infected_neighbours(self, new_value):
@@ -153,13 +121,21 @@ class Cell:
         :param new_value: (int) new number of infected neighbour
         :return: None
         """
-        self._n_infected_neighbours = new_value
-        if self.state == State.S:
-            rate_per_neighbour = self.network.ALPHA + (self.network.BETA * (self._n_infected_neighbours - 1))
-            self._rate_of_getting_infected = max(0.0, self._n_infected_neighbours * rate_per_neighbour)
+        network = self.network
+        network.n_inf_arr[self.index] = new_value
+        if network.state_arr[self.index] == S_CODE:
+            if new_value < len(network._rate_table):
+                rate = network._rate_table[new_value]
+            else:
+                rate_per_neighbour = network.ALPHA + (network.BETA * (new_value - 1))
+                rate = max(0.0, new_value * rate_per_neighbour)
         else:
-            self._rate_of_getting_infected = 0.0
-        self._is_safe = self._rate_of_getting_infected < 1e-10
+            rate = 0.0
+        network.rate_arr[self.index] = rate
+        network.is_safe_arr[self.index] = rate < 1e-10
+        network._threat_cdf = None
+        network._rate_tree.set(self.index, rate)
+        network._sync_threatened(self.index)
 
     @property
     def rate_of_getting_infected(self):
@@ -168,7 +144,21 @@ class Cell:
 
         :return: None
         """
-        return self._rate_of_getting_infected
+        return self.network.rate_arr[self.index]
+
+    @property
+    def neighbour_indices(self) -> np.ndarray:
+        """
+        Flat indices of all neighbours, cached until the topology changes.
+
+        :return: (numpy array) flat index for each neighbour
+        """
+        if self._neighbour_indices is None:
+            self._neighbour_indices = np.fromiter(
+                (neighbour.index for neighbour in self._neighbours),
+                dtype=np.int32, count=len(self._neighbours)
+            )
+        return self._neighbour_indices
 
     def add_neighbour(self, new_cell: 'Cell'):
         """
@@ -178,6 +168,7 @@ class Cell:
         :return: None
         """
         self._neighbours.append(new_cell)
+        self._neighbour_indices = None
 
     def remove_neighbour(self, old_cell: 'Cell'):
         """
@@ -187,6 +178,7 @@ class Cell:
         :return: None
         """
         self._neighbours.remove(old_cell)
+        self._neighbour_indices = None
 
     def neighbour_ids(self):
         """
@@ -207,7 +199,8 @@ class Cell:
         if replace:
             if len(self._neighbours) == 0:
                 return False
-            _replace = np.random.choice(self._neighbours)
+            # randint indexing avoids choice() converting the list to an object array
+            _replace = self._neighbours[np.random.randint(len(self._neighbours))]
             self.remove_neighbour(_replace)
             _replace.remove_neighbour(self)
         self.add_neighbour(new_cell)
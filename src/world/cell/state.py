@@ -7,3 +7,12 @@ class State(Enum):
     I = 'I'
     R = 'R'
 
+
+# Integer codes used for the network's state array, and the reverse lookup
+STATE_CODES = {State.S: 0, State.I: 1, State.R: 2}
+CODE_STATES = [State.S, State.I, State.R]
+
+# Plain int aliases for hot-path comparisons; the Enum stays the external API
+S_CODE = STATE_CODES[State.S]
+I_CODE = STATE_CODES[State.I]
+R_CODE = STATE_CODES[State.R]
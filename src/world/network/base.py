@@ -1,19 +1,105 @@
+import heapq
 from abc import abstractmethod
 from logging import getLogger
 from typing import Any, Callable, List, Union, Optional
 
-from src.error import NetworkError
+import numpy as np
+
+from src.error import CellError, NetworkError
 from src.world.callbacks.base import Callback
 from src.world.callbacks.group import CallbacksGroup
 from src.world.cell import Cell
-from src.world.cell.state import State
+from src.world.cell.state import State, STATE_CODES, CODE_STATES, S_CODE, I_CODE, R_CODE
+from src.world.simulation.fenwick import RateTree
 
 logger = getLogger(__name__)
 
 
+def _update_neighbour_rates(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours, delta, rate_table, alpha, beta) -> float:
+    """
+    Apply an infected-neighbour count change to a cell's neighbours and
+    recompute their infection rates, returning the change in the rates sum.
+    Runs once per event, so is jitted with numba when available.
+
+    :param state_arr, n_inf_arr, rate_arr, is_safe_arr: (numpy arrays) network state arrays
+    :param neighbours: (numpy array) flat indices of the neighbours to update
+    :param delta: (int) +1 when the cell became Infected, -1 when Removed
+    :param rate_table: (numpy array) precomputed rate for each infected-neighbour count
+    :param alpha: (float) base synergy-free infection rate (fallback beyond the table)
+    :param beta: (float) synergy factor (fallback beyond the table)
+    :return: (float) change in the sum of all infection rates
+    """
+    total = 0.0
+    for k in range(len(neighbours)):
+        j = neighbours[k]
+        n_inf_arr[j] += delta
+        if state_arr[j] == 0:  # Susceptible (STATE_CODES[State.S])
+            count = n_inf_arr[j]
+            if count < len(rate_table):
+                rate = rate_table[count]
+            else:
+                # Rewiring can push a degree beyond the precomputed table
+                rate = count * (alpha + beta * (count - 1))
+                if rate < 0.0:
+                    rate = 0.0
+            total += rate - rate_arr[j]
+            rate_arr[j] = rate
+            is_safe_arr[j] = rate < 1e-10
+    return total
+
+
+def _update_one_neighbour_rate(state_arr, n_inf_arr, rate_arr, is_safe_arr, j, delta, rate_table, alpha, beta) -> float:
+    """
+    Apply the count delta to a single neighbour and recompute its rate.
+
+    :param j: (int) flat index of the neighbour
+    :return: (float) change in the sum of all infection rates
+    """
+    n_inf_arr[j] += delta
+    if state_arr[j] != 0:  # not Susceptible
+        return 0.0
+    count = n_inf_arr[j]
+    if count < len(rate_table):
+        rate = rate_table[count]
+    else:
+        # Rewiring can push a degree beyond the precomputed table
+        rate = count * (alpha + beta * (count - 1))
+        if rate < 0.0:
+            rate = 0.0
+    change = rate - rate_arr[j]
+    rate_arr[j] = rate
+    is_safe_arr[j] = rate < 1e-10
+    return change
+
+
+def _update_neighbour_rates_4(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours, delta, rate_table, alpha, beta) -> float:
+    """
+    Unrolled variant of _update_neighbour_rates for the fixed degree-4 case
+    (rectilinear grids), avoiding loop overhead on the tightest kernel.
+
+    :return: (float) change in the sum of all infection rates
+    """
+    total = _update_one_neighbour_rate(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours[0], delta, rate_table, alpha, beta)
+    total += _update_one_neighbour_rate(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours[1], delta, rate_table, alpha, beta)
+    total += _update_one_neighbour_rate(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours[2], delta, rate_table, alpha, beta)
+    total += _update_one_neighbour_rate(state_arr, n_inf_arr, rate_arr, is_safe_arr, neighbours[3], delta, rate_table, alpha, beta)
+    return total
+
+
+try:
+    from numba import njit
+    _update_neighbour_rates = njit(cache=True)(_update_neighbour_rates)
+    _update_one_neighbour_rate = njit(cache=True)(_update_one_neighbour_rate)
+    _update_neighbour_rates_4 = njit(cache=True)(_update_neighbour_rates_4)
+except ImportError:
+    pass
+
+
 class Network:
     """
     Base class for Small World Network simulations.
+    Per-cell scalars are stored as parallel numpy arrays indexed by the flat
+    cell index; Cell objects are thin views onto these arrays.
 
     Attributes:
         alpha: (float) base synergy-free infection rate
@@ -22,10 +108,21 @@ class Network:
         time: (float) current time of simulation
         extinct: (bool) is the disease extinct now
 
-        _cells: (list of Cells) all cells in the network
-        _cells_by_id: (dict of Cells) all cells, keyed by cell.id values
-        _cells_by_state: (dict of list of Cells) cells grouped by cell.state values
-        _sum_rates: (float) keep track of rates to stop summing
+        state_arr: (numpy array of int8) state code for each cell
+        remove_at_arr: (numpy array of float) removal time for each cell (inf if none pending)
+        n_inf_arr: (numpy array of int16) number of infected neighbours for each cell
+        rate_arr: (numpy array of float) infection rate for each cell
+        is_safe_arr: (numpy array of bool) whether each cell's rate is (nearly) zero
+
+        _cells: (list of Cells) all cells in the network (indexable by flat cell index)
+        _bucket: (dict of numpy arrays) cell indices grouped by state
+        _bucket_size: (dict of int) number of valid entries in each bucket
+        _pos: (numpy array of int32) position of each cell within its bucket
+        _threatened_bucket: (numpy array of int32) indices of threatened cells
+        _threatened_size: (int) number of valid entries in the threatened bucket
+        _threatened_pos: (numpy array of int32) position of each cell in the threatened bucket
+        _in_threatened: (numpy array of bool) membership flags for the threatened bucket
+        _rate_tree: (RateTree) segment tree of per-cell rates; its root is the rates sum
 
     Properties:
         sum_events_rates: (float) sum of all infection rates (should be sum(_threatened_cells_dict.keys())
@@ -49,15 +146,118 @@ class Network:
 
         self.time = 0.0
         self.extinct = False
-        self._sum_rates = 0.0
 
         self._cells = self.generate_cells()
-        self._cells_by_id = {
-            cell.id: cell for cell in self._cells
-        }
-        self._cells_by_state = {
-            state: [cell for cell in self._cells if cell.state == state] for state in State
-        }
+
+        n_cells = len(self._cells)
+        self.state_arr = np.zeros(n_cells, dtype=np.int8)
+        self.remove_at_arr = np.full(n_cells, np.inf, dtype=float)
+        self.n_inf_arr = np.zeros(n_cells, dtype=np.int16)
+        self.rate_arr = np.zeros(n_cells, dtype=float)
+        self.is_safe_arr = np.ones(n_cells, dtype=bool)
+
+        # Static coordinate arrays, filled once and shared by every Snapshot
+        self.x_arr = np.empty(n_cells, dtype=np.float32)
+        self.y_arr = np.empty(n_cells, dtype=np.float32)
+
+        for index, cell in enumerate(self._cells):
+            cell.index = index
+            self.x_arr[index] = cell.x
+            self.y_arr[index] = cell.y
+            if cell._initial_state != State.S:
+                self.state_arr[index] = STATE_CODES[cell._initial_state]
+
+        self._bucket = [np.empty(n_cells, dtype=np.int32) for _ in CODE_STATES]
+        self._bucket_size = [0 for _ in CODE_STATES]
+        self._pos = np.empty(n_cells, dtype=np.int32)
+        self._fill_buckets()
+
+        self._threatened_bucket = np.empty(n_cells, dtype=np.int32)
+        self._threatened_size = 0
+        self._threatened_pos = np.empty(n_cells, dtype=np.int32)
+        self._in_threatened = np.zeros(n_cells, dtype=bool)
+
+        self._remove_heap = []
+        self._threat_cdf = None
+        self._rate_tree = RateTree(n_cells)
+
+        self._max_degree = max((len(cell._neighbours) for cell in self._cells), default=0)
+        self._refresh_rate_table()
+
+    def _fill_buckets(self):
+        """
+        Rebuild the per-state index buckets from the state array.
+
+        :return: None
+        """
+        for code in range(len(CODE_STATES)):
+            self._bucket_size[code] = 0
+        for index in range(len(self._cells)):
+            code = int(self.state_arr[index])
+            size = self._bucket_size[code]
+            self._bucket[code][size] = index
+            self._pos[index] = size
+            self._bucket_size[code] = size + 1
+
+    def _state_indices(self, state: State) -> np.ndarray:
+        """
+        Flat indices of all cells currently in the given state.
+
+        :param state: (State) state to look up
+        :return: (numpy array) view of the bucket for that state
+        """
+        code = STATE_CODES[state]
+        return self._bucket[code][:self._bucket_size[code]]
+
+    def _sync_threatened(self, index: int):
+        """
+        Move a cell in or out of the threatened bucket to match its current
+        state and rate. Idempotent, and O(1) either way.
+
+        :param index: (int) flat index of the cell to sync
+        :return: None
+        """
+        should_be_threatened = (
+            self.state_arr[index] == S_CODE and not self.is_safe_arr[index]
+        )
+
+        if should_be_threatened and not self._in_threatened[index]:
+            size = self._threatened_size
+            self._threatened_bucket[size] = index
+            self._threatened_pos[index] = size
+            self._threatened_size = size + 1
+            self._in_threatened[index] = True
+
+        elif not should_be_threatened and self._in_threatened[index]:
+            size = self._threatened_size - 1
+            position = self._threatened_pos[index]
+            last = self._threatened_bucket[size]
+            self._threatened_bucket[position] = last
+            self._threatened_pos[last] = position
+            self._threatened_size = size
+            self._in_threatened[index] = False
+
+    @property
+    def threatened_indices(self) -> np.ndarray:
+        """
+        Flat indices of all threatened cells, for array-level consumers.
+
+        :return: (numpy array) view of the threatened bucket
+        """
+        return self._threatened_bucket[:self._threatened_size]
+
+    @property
+    def threat_cdf(self) -> np.ndarray:
+        """
+        Cumulative sum of the threatened cells' infection rates, aligned with
+        threatened_indices. Cached between events so repeated samplers within
+        one step share a single gather + cumsum.
+
+        :return: (numpy array) cumulative rates of the threatened cells
+        """
+        if self._threat_cdf is None:
+            self._threat_cdf = np.cumsum(self.rate_arr[self.threatened_indices])
+        return self._threat_cdf
 
     def update_disease_type(self, alpha: Optional[float] = None, beta: Optional[float] = None, tau: Optional[float] = None):
         """
@@ -71,6 +271,18 @@ class Network:
         self.ALPHA = self.ALPHA if alpha is None else alpha
         self.BETA = self.BETA if beta is None else beta
         self.INFECTION_TIME = self.INFECTION_TIME if tau is None else tau
+        self._refresh_rate_table()
+
+    def _refresh_rate_table(self):
+        """
+        Precompute the infection rate for every possible infected-neighbour
+        count up to the maximum degree, so per-event updates index a table
+        instead of recomputing the rate formula.
+
+        :return: None
+        """
+        counts = np.arange(self._max_degree + 1)
+        self._rate_table = np.maximum(0.0, counts * (self.ALPHA + self.BETA * (counts - 1)))
 
     def reset(self):
         """
@@ -82,14 +294,28 @@ class Network:
 
         self.time = 0
         self.extinct = False
-        self._sum_rates = 0.0
+        self._rate_tree.clear()
+
+        # Reset every cell at once by filling the state arrays in place
+        self.state_arr.fill(S_CODE)
+        self.remove_at_arr.fill(np.inf)
+        self.n_inf_arr.fill(0)
+        self.rate_arr.fill(0.0)
+        self.is_safe_arr.fill(True)
+
+        # All cells are Susceptible again; refill the index buckets in place
+        n_cells = len(self._cells)
+        self._bucket[S_CODE][:] = np.arange(n_cells, dtype=np.int32)
+        self._pos[:] = np.arange(n_cells, dtype=np.int32)
+        self._bucket_size[S_CODE] = n_cells
+        self._bucket_size[I_CODE] = 0
+        self._bucket_size[R_CODE] = 0
 
-        for cell in self._cells:
-            cell.reset()
+        self._threatened_size = 0
+        self._in_threatened.fill(False)
 
-        self._cells_by_state = {
-            state: [cell for cell in self._cells if cell.state == state] for state in State
-        }
+        self._remove_heap = []
+        self._threat_cdf = None
 
     def run(self, callback: Union[Callback, List[Callback]] = None):
         """
@@ -99,7 +325,7 @@ class Network:
         :return: None
         """
 
-        if len(self.infected_cells) == 0:
+        if self._bucket_size[I_CODE] == 0:
             raise NetworkError('Unable to run simulation with no infected cells.')
 
         callback = CallbacksGroup(callback)
@@ -119,35 +345,134 @@ class Network:
 
         callback.on_simulation_finished(self)
 
-    def cell_state_changed(self, cell: Cell, old_state: State, new_state: State):
+    def _resync_after_bulk(self):
+        """
+        Rebuild every derived structure (safety flags, state buckets,
+        threatened bucket, removal heap, rate tree, CDF cache) from the state
+        arrays, after a bulk kernel has mutated them directly.
+
+        :return: None
+        """
+        np.less(self.rate_arr, 1e-10, out=self.is_safe_arr)
+        self._fill_buckets()
+
+        self._threatened_size = 0
+        self._in_threatened.fill(False)
+        self._threat_cdf = None
+        for index in np.nonzero((self.state_arr == S_CODE) & ~self.is_safe_arr)[0]:
+            self._sync_threatened(int(index))
+
+        infected = self._bucket[I_CODE][:self._bucket_size[I_CODE]]
+        self._remove_heap = [(float(self.remove_at_arr[index]), int(index)) for index in infected]
+        heapq.heapify(self._remove_heap)
+
+        self._rate_tree.rebuild(self.rate_arr)
+
+    def run_batch(self, n_replicas: int):
+        """
+        Run many independent replicas of the current configuration at once,
+        with all replica state stacked into (R, N) arrays. Useful for
+        parameter sweeps where Python event dispatch dominates.
+        The network itself is left untouched.
+
+        :param n_replicas: (int) number of replicas to run
+        :return: (dict of numpy arrays) per-replica results
+        """
+        from src.world.simulation.batch import BatchKineticMonteCarloSimulation
+        return BatchKineticMonteCarloSimulation.run(self, n_replicas)
+
+    def apply_state_change(self, cell: Cell, new_state: State):
+        """
+        Apply a state change for one cell to the state arrays.
+        Updates the cell's own rate and removal time, adjusts the infected-
+        neighbour counts and rates of its neighbours in one vectorized pass,
+        and keeps the running rates sum in step.
+
+        :param cell: (Cell) cell whose state is changing
+        :param new_state: (State) new state for the cell
+        :return: None
+        """
+
+        new_code = STATE_CODES.get(new_state)
+        if new_code is None:
+            raise CellError('Undefined behaviour when state changes to {}'.format(new_state))
+
+        # Rates and/or threatened membership are about to change
+        self._threat_cdf = None
+
+        index = cell.index
+        old_code = int(self.state_arr[index])
+
+        self.state_arr[index] = new_code
+
+        # TODO this is only for SIR model; usually need to have method for all pairs of old state and new state
+        if new_code == S_CODE:
+            neighbour_delta = 0
+
+        elif new_code == I_CODE:
+            remove_at = self.time + self.INFECTION_TIME
+            self.remove_at_arr[index] = remove_at
+            heapq.heappush(self._remove_heap, (remove_at, index))
+            self.rate_arr[index] = 0.0
+            self.is_safe_arr[index] = True
+            neighbour_delta = 1
+
+        else:
+            self.remove_at_arr[index] = np.inf
+            self.rate_arr[index] = 0.0
+            self.is_safe_arr[index] = True
+            neighbour_delta = -1
+
+        self._rate_tree.set(index, self.rate_arr[index])
+        self._sync_threatened(index)
+
+        if neighbour_delta != 0:
+            neighbours = cell.neighbour_indices
+            if len(neighbours) > 0:
+                # Degree 4 (the rectilinear case) gets the unrolled kernel
+                kernel = _update_neighbour_rates_4 if len(neighbours) == 4 else _update_neighbour_rates
+                kernel(
+                    self.state_arr, self.n_inf_arr, self.rate_arr, self.is_safe_arr,
+                    neighbours, neighbour_delta, self._rate_table, self.ALPHA, self.BETA
+                )
+                for neighbour_index in neighbours:
+                    self._rate_tree.set(neighbour_index, self.rate_arr[neighbour_index])
+                    self._sync_threatened(neighbour_index)
+
+        self.cell_state_changed(cell, old_code, new_code)
+
+    def cell_state_changed(self, cell: Cell, old_state: int, new_state: int):
         """
         Called after a cell's state has changed.
-        Moves the cell in the self._cells_by_state lists.
+        Moves the cell between the per-state index buckets in O(1) via
+        swap-with-last and the reverse position index.
 
         :param cell: (Cell) cell whose state has changed
-        :param old_state: (State) old state of cell
-        :param new_state: (State) new state of cell
+        :param old_state: (int) old state code of cell
+        :param new_state: (int) new state code of cell
         :return: None
         """
 
         if old_state == new_state:
             return
 
-        if cell in self._cells_by_state[old_state]:
-            self._cells_by_state[old_state].remove(cell)
-        else:
-            logger.error(
-                'Cell {} changed state from {} to {}, '.format(cell, old_state, new_state) +
-                'but did not exist in _cells_by_state[{}]'.format(old_state)
-            )
+        index = cell.index
 
-        if cell not in self._cells_by_state[new_state]:
-            self._cells_by_state[new_state].append(cell)
-        else:
-            logger.error(
-                'Cell {} changed state from {} to {}, '.format(cell, old_state, new_state) +
-                'but already existed in _cells_by_state[{}]'.format(new_state)
-            )
+        # Remove from the old bucket by swapping the last entry into its slot
+        old_bucket = self._bucket[old_state]
+        old_size = self._bucket_size[old_state] - 1
+        position = self._pos[index]
+        last = old_bucket[old_size]
+        old_bucket[position] = last
+        self._pos[last] = position
+        self._bucket_size[old_state] = old_size
+
+        # Append to the end of the new bucket
+        new_bucket = self._bucket[new_state]
+        new_size = self._bucket_size[new_state]
+        new_bucket[new_size] = index
+        self._pos[index] = new_size
+        self._bucket_size[new_state] = new_size + 1
 
     @abstractmethod
     def generate_cells(self, *args, **kwargs) -> List[Cell]:
@@ -185,7 +510,8 @@ class Network:
 
         :return: (list of Cell) safe cells
         """
-        return [cell for cell in self._cells_by_state[State.S] if cell.is_safe]
+        susceptible = self._state_indices(State.S)
+        return [self._cells[index] for index in susceptible[self.is_safe_arr[susceptible]]]
 
     @property
     def threatened_cells(self) -> List[Cell]:
@@ -194,7 +520,7 @@ class Network:
 
         :return: (list of Cell) threatened cells
         """
-        return [cell for cell in self._cells_by_state[State.S] if not cell.is_safe]
+        return [self._cells[index] for index in self.threatened_indices]
 
     @property
     def infected_cells(self) -> List[Cell]:
@@ -203,7 +529,7 @@ class Network:
 
         :return: (list of Cell) infected cells
         """
-        return self._cells_by_state[State.I]
+        return [self._cells[index] for index in self._state_indices(State.I)]
 
     @property
     def removed_cells(self) -> List[Cell]:
@@ -212,7 +538,7 @@ class Network:
 
         :return: (list of Cell) removed cells
         """
-        return self._cells_by_state[State.R]
+        return [self._cells[index] for index in self._state_indices(State.R)]
 
     @property
     def percentage_safe(self) -> float:
@@ -221,7 +547,8 @@ class Network:
 
         :return:
         """
-        return 100.0 * float(len(self.safe_cells)) / float(len(self._cells))
+        n_safe = self._bucket_size[S_CODE] - self._threatened_size
+        return 100.0 * float(n_safe) / float(len(self._cells))
 
     @property
     def percentage_infected(self) -> float:
@@ -230,7 +557,7 @@ class Network:
 
         :return:
         """
-        return 100.0 * float(len(self.infected_cells)) / float(len(self._cells))
+        return 100.0 * float(self._bucket_size[I_CODE]) / float(len(self._cells))
 
     @property
     def percentage_removed(self) -> float:
@@ -239,7 +566,7 @@ class Network:
 
         :return:
         """
-        return 100.0 * float(len(self.removed_cells)) / float(len(self._cells))
+        return 100.0 * float(self._bucket_size[R_CODE]) / float(len(self._cells))
 
     @property
     def next_remove_time(self) -> float:
@@ -248,26 +575,53 @@ class Network:
 
         :return: (float) time for next Remove event
         """
-        return min([cell.remove_at_time for cell in self.infected_cells])
+        return self._clean_remove_heap()[0][0]
+
+    @property
+    def next_remove_cell(self) -> Cell:
+        """
+        The infected cell with the earliest removal time.
+
+        :return: (Cell) next cell to be removed
+        """
+        return self._cells[self._clean_remove_heap()[0][1]]
+
+    def _clean_remove_heap(self):
+        """
+        Drop stale heap entries (cells no longer infected, or re-infected
+        with a different removal time) until the top entry is valid.
+
+        :param: None
+        :return: (list) the removal heap, with a valid top entry
+        """
+        heap = self._remove_heap
+        while heap:
+            remove_at, index = heap[0]
+            if self.state_arr[index] == I_CODE and self.remove_at_arr[index] == remove_at:
+                break
+            heapq.heappop(heap)
+        if not heap:
+            raise NetworkError('No infected cells remain to be removed.')
+        return heap
 
     @property
     def sum_events_rates(self) -> float:
         """
-        Sum of all infection events.
+        Sum of all infection events (the rate tree's root).
 
         :return: (float) sum of all infection events
         """
-        return self._sum_rates
+        return self._rate_tree.total
 
-    @sum_events_rates.setter
-    def sum_events_rates(self, new_rates: float):
+    def apply_map_array(self, field: str) -> np.ndarray:
         """
-        Setter for the sum of all events rates.
+        Fast path for numeric per-cell fields: return the underlying SoA array
+        directly instead of mapping a function over every Cell.
 
-        :param new_rates: (float) new events rates
-        :return: None
+        :param field: (str) field name, e.g. 'state', 'rate', 'remove_at'
+        :return: (numpy array) the network's array for that field
         """
-        self._sum_rates = new_rates
+        return getattr(self, field + '_arr')
 
     def apply_map(self, function: Callable[[Cell], Any]) -> List[Any]:
         """
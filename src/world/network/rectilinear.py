@@ -1,8 +1,9 @@
 from typing import List, Tuple
 
-from numpy import zeros, array, ndarray
+from numpy import arange, array, int32, ndarray, roll, stack, where, zeros
 
 from src.world.cell import Cell, State
+from src.world.cell.state import STATE_CODES, I_CODE
 from src.world.network.base import Network
 
 
@@ -19,15 +20,16 @@ class Rectilinear2DNetwork(Network):
     Attributes:
         n_x: (int) size of the map in x direction
         n_y: (int) size of the map in y direction
+        neighbour_table: ((N, 4) numpy array) flat neighbour indices for each cell
         _cell_map_2d: (2d numpy array) map of cells
         _shader_x: (1d numpy array) boolean array measuring whether each column (x-index) has ANY infected cells in it
         _shader_y: (1d numpy array) boolean array measuring whether each row (y-index) has ANY infected cells in it
     """
-    adjacent_cell_vectors = [
-        (-1, 0),   # West
-        (1, 0),    # East
-        (0, 1),    # North
-        (0, -1)    # South
+    adjacent_cell_shifts = [
+        (1, 0),    # West
+        (-1, 0),   # East
+        (-1, 1),   # North
+        (1, 1)     # South
     ]
 
     def __init__(self, shape: Tuple[int, int], alpha: float = 0.7, beta: float = 0.0, tau: float = 1.0):
@@ -41,6 +43,10 @@ class Rectilinear2DNetwork(Network):
         self.n_y = n_y
         self._shader_x = zeros(self.n_x, dtype=bool)
         self._shader_y = zeros(self.n_y, dtype=bool)
+        self._epidemic_x = False
+        self._epidemic_y = False
+        self._epidemic_x_dirty = False
+        self._epidemic_y_dirty = False
         self._cell_map_2d = None
         super().__init__(alpha=alpha, beta=beta, tau=tau)
 
@@ -48,20 +54,33 @@ class Rectilinear2DNetwork(Network):
         super().reset()
         self._shader_x[:] = False
         self._shader_y[:] = False
+        self._epidemic_x = False
+        self._epidemic_y = False
+        self._epidemic_x_dirty = False
+        self._epidemic_y_dirty = False
 
     def to_array(self) -> ndarray:
         """
         Convert to array for the different cell states.
+        One fused numpy pass over the state arrays, rather than calling
+        array_value on every cell.
 
         :return: (numpy array) 2D array, with values 0->1
         """
-        return array([
-            [cell.array_value for cell in row] for row in self._cell_map_2d
-        ])
+        states = self.state_arr
+        infected_values = (self.time - (self.remove_at_arr - self.INFECTION_TIME)) / self.INFECTION_TIME
+        values = where(
+            states == STATE_CODES[State.S], 0.0,
+            where(states == STATE_CODES[State.R], 1.0, infected_values)
+        )
+        return values.reshape(self.n_x, self.n_y)
 
     def generate_cells(self) -> List[Cell]:
         """
         Generate a list of the cells to represent the map.
+        The periodic neighbour topology is built as a single (N, 4) int32
+        table from four rolls of the index grid, instead of per-cell
+        wrap-around arithmetic.
 
         :return: (list of Cell) all cells in the map
         """
@@ -71,32 +90,33 @@ class Rectilinear2DNetwork(Network):
             for x in range(self.n_x)
         ])
 
-        for column in self._cell_map_2d:
-            for cell in column:
-                for (other_x, other_y) in self.adjacent_cell_coords(cell.x, cell.y):
-                    self._cell_map_2d[other_x][other_y].add_neighbour(cell)
+        cells = list(self._cell_map_2d.flatten())
 
-        return list(self._cell_map_2d.flatten())
+        index_grid = arange(self.n_x * self.n_y).reshape(self.n_x, self.n_y)
+        shifted = [roll(index_grid, shift, axis=axis) for (shift, axis) in self.adjacent_cell_shifts]
+        self.neighbour_table = stack(shifted, axis=-1).reshape(-1, 4).astype(int32)
 
-    def adjacent_cell_coords(self, x: int, y: int) -> List[Tuple[int, int]]:
-        """
-        Get list of adjacent cells to a specific one.
+        for index, (cell, neighbour_row) in enumerate(zip(cells, self.neighbour_table)):
+            cell.index = index
+            cell._neighbours = [cells[neighbour] for neighbour in neighbour_row]
+            cell._neighbour_indices = neighbour_row
 
-        :param x: (int) x location
-        :param y: (int) y location
-        :return: (list of tuples) all locations that are adjacent to (x, y)
-        """
-        return [self.wrap_periodic(x + dx, y + dy) for (dx, dy) in self.adjacent_cell_vectors]
+        return cells
 
-    def wrap_periodic(self, x: int, y: int ) -> Tuple[int, int]:
+    def _epidemic_flags(self) -> Tuple[bool, bool]:
         """
-        Wrap a location using Periodic Boundary Conditions.
+        Whether every column / row contains an infection.
+        The C-level .all() reductions only rerun after a shader bit flips.
 
-        :param x: (int) x location
-        :param y: (int) y location
-        :return: (tuple) x and y indications that are corrected to be within bounds.
+        :return: (tuple of bool) epidemic flags for the x and y directions
         """
-        return x % self.n_x, y % self.n_y
+        if self._epidemic_x_dirty:
+            self._epidemic_x = bool(self._shader_x.all())
+            self._epidemic_x_dirty = False
+        if self._epidemic_y_dirty:
+            self._epidemic_y = bool(self._shader_y.all())
+            self._epidemic_y_dirty = False
+        return self._epidemic_x, self._epidemic_y
 
     def is_epidemic(self, type: str) -> bool:
         """
@@ -105,11 +125,13 @@ class Rectilinear2DNetwork(Network):
         :param type: (str) type of epidemic
         :return: (bool) True iff network is in the specified epidemic state.
         """
+        epidemic_x, epidemic_y = self._epidemic_flags()
+
         if type == EpidemicType2D.OneDimensionalType:
-            return all(self._shader_x) != all(self._shader_y)
+            return epidemic_x != epidemic_y
 
         elif type == EpidemicType2D.TwoDimensionalType:
-            return all(self._shader_x) and all(self._shader_y)
+            return epidemic_x and epidemic_y
 
         else:
             raise NotImplementedError('Unknown Epidemic type: %s' % type)
@@ -119,8 +141,7 @@ class Rectilinear2DNetwork(Network):
         Determine the maximal epidemic type (i.e. 2D, otherwise 1D, otherwise none)
         :return: (str) the type of epidemic
         """
-        epidemic_x = all(self._shader_x)
-        epidemic_y = all(self._shader_y)
+        epidemic_x, epidemic_y = self._epidemic_flags()
         if epidemic_x != epidemic_y:
             return EpidemicType2D.OneDimensionalType
         elif epidemic_x and epidemic_y:
@@ -134,9 +155,22 @@ class Rectilinear2DNetwork(Network):
         cell_to_infect = self._cell_map_2d[cx, cy]
         cell_to_infect.state = State.I
 
-    def cell_state_changed(self, cell: Cell, old_state: State, new_state: State):
+    def _resync_after_bulk(self):
+        """ Also rebuild the shaders: in SIR, any non-Susceptible cell was infected at some point. """
+        super()._resync_after_bulk()
+        ever_infected = (self.state_arr != 0).reshape(self.n_x, self.n_y)
+        self._shader_x[:] = ever_infected.any(axis=1)
+        self._shader_y[:] = ever_infected.any(axis=0)
+        self._epidemic_x_dirty = True
+        self._epidemic_y_dirty = True
+
+    def cell_state_changed(self, cell: Cell, old_state: int, new_state: int):
         """ Wrap superclass method, to track shaders each time a cell is infected. """
-        if new_state == State.I:
-            self._shader_x[cell.x] = True
-            self._shader_y[cell.y] = True
+        if new_state == I_CODE:
+            if not self._shader_x[cell.x]:
+                self._shader_x[cell.x] = True
+                self._epidemic_x_dirty = True
+            if not self._shader_y[cell.y]:
+                self._shader_y[cell.y] = True
+                self._epidemic_y_dirty = True
         super().cell_state_changed(cell, old_state, new_state)
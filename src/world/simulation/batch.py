@@ -0,0 +1,157 @@
+from logging import getLogger
+from typing import Dict
+
+import numpy as np
+
+from src.error import NetworkError
+from src.world.cell.state import S_CODE, I_CODE, R_CODE
+from src.world.network.base import Network
+from src.world.simulation.base import Simulation
+
+logger = getLogger(__name__)
+
+
+class BatchKineticMonteCarloSimulation(Simulation):
+    """
+    Vectorized Kinetic Monte Carlo over many independent replicas.
+    All replica state is stacked into (R, N) arrays, and each loop iteration
+    advances every still-active replica by one event, so the Python dispatch
+    cost is amortized across the whole batch.
+    """
+
+    @staticmethod
+    def run(network: Network, n_replicas: int) -> Dict[str, np.ndarray]:
+        """
+        Run n_replicas independent copies of the network's current
+        configuration to extinction.
+
+        :param network: (Network) network whose current state seeds every replica
+        :param n_replicas: (int) number of replicas to run
+        :return: (dict of numpy arrays) per-replica final time, state matrix and percentages
+        """
+
+        neighbour_table = BatchKineticMonteCarloSimulation.neighbour_table(network)
+        n_cells = len(network.state_arr)
+        rate_table = network._rate_table
+        infection_time = network.INFECTION_TIME
+
+        # Stack the network's current state into one row per replica
+        state = np.tile(network.state_arr, (n_replicas, 1))
+        n_inf = np.tile(network.n_inf_arr, (n_replicas, 1))
+        rate = np.tile(network.rate_arr, (n_replicas, 1))
+        remove_at = np.tile(network.remove_at_arr, (n_replicas, 1))
+        sum_rates = np.full(n_replicas, network.sum_events_rates)
+        time = np.full(n_replicas, network.time, dtype=float)
+        n_infected = np.full(n_replicas, int(np.count_nonzero(network.state_arr == I_CODE)))
+
+        active = n_infected > 0
+        if not active.any():
+            raise NetworkError('Unable to run simulation with no infected cells.')
+
+        rows_range = np.arange(n_replicas)
+
+        while active.any():
+            rows = rows_range[active]
+
+            # Sample a random time for the next step in every active replica
+            random_u = np.random.uniform(size=len(rows))
+            with np.errstate(divide='ignore'):
+                delta_t = np.where(sum_rates[rows] > 1e-10,
+                                   np.log(1.0 / random_u) / sum_rates[rows], np.inf)
+
+            next_remove_cell = remove_at[rows].argmin(axis=1)
+            next_remove_time = remove_at[rows, next_remove_cell]
+
+            remove_mask = time[rows] + delta_t >= next_remove_time
+
+            # Remove events
+            remove_rows = rows[remove_mask]
+            if len(remove_rows):
+                cells = next_remove_cell[remove_mask]
+                time[remove_rows] = next_remove_time[remove_mask]
+                state[remove_rows, cells] = R_CODE
+                remove_at[remove_rows, cells] = np.inf
+                n_infected[remove_rows] -= 1
+                BatchKineticMonteCarloSimulation._update_neighbours(
+                    state, n_inf, rate, sum_rates, neighbour_table, rate_table, remove_rows, cells, -1
+                )
+
+            # Infection events
+            infect_rows = rows[~remove_mask]
+            if len(infect_rows):
+                time[infect_rows] += delta_t[~remove_mask]
+
+                # Categorical sample over each row's rates via its CDF
+                row_rates = rate[infect_rows]
+                cdf = np.cumsum(row_rates, axis=1)
+                targets = np.random.uniform(size=len(infect_rows)) * cdf[:, -1]
+                cells = (cdf < targets[:, None]).sum(axis=1).clip(max=n_cells - 1)
+
+                sum_rates[infect_rows] -= rate[infect_rows, cells]
+                rate[infect_rows, cells] = 0.0
+                state[infect_rows, cells] = I_CODE
+                remove_at[infect_rows, cells] = time[infect_rows] + infection_time
+                n_infected[infect_rows] += 1
+                BatchKineticMonteCarloSimulation._update_neighbours(
+                    state, n_inf, rate, sum_rates, neighbour_table, rate_table, infect_rows, cells, 1
+                )
+
+            active = n_infected > 0
+
+        return {
+            'time': time,
+            'state': state,
+            'percentage_removed': 100.0 * np.count_nonzero(state == R_CODE, axis=1) / float(n_cells),
+            'percentage_safe': 100.0 * np.count_nonzero(state == S_CODE, axis=1) / float(n_cells),
+        }
+
+    @staticmethod
+    def neighbour_table(network: Network) -> np.ndarray:
+        """
+        Get the fixed-degree neighbour table for the network.
+
+        :param network: (Network) network to read the topology from
+        :return: ((N, degree) numpy array) flat neighbour indices per cell
+        """
+        degrees = {len(cell._neighbours) for cell in network._cells}
+        if len(degrees) != 1:
+            raise NetworkError('Batch simulation requires a fixed-degree network.')
+
+        table = np.vstack([cell.neighbour_indices for cell in network._cells])
+
+        # Duplicate edges (e.g. the wrap-around pairs on 2-wide periodic
+        # grids) would be under-counted by the vectorized neighbour updates
+        sorted_rows = np.sort(table, axis=1)
+        if (sorted_rows[:, 1:] == sorted_rows[:, :-1]).any():
+            raise NetworkError('Batch simulation requires distinct neighbours per cell.')
+
+        return table
+
+    @staticmethod
+    def _update_neighbours(state, n_inf, rate, sum_rates, neighbour_table, rate_table, rows, cells, delta):
+        """
+        Apply an infected-neighbour delta for one event per row, updating the
+        neighbours' counts and rates for all rows at once.
+
+        :param state, n_inf, rate: ((R, N) numpy arrays) replica state
+        :param sum_rates: ((R,) numpy array) per-replica rate sums
+        :param neighbour_table: ((N, degree) numpy array) topology
+        :param rate_table: (numpy array) precomputed rate per neighbour count
+        :param rows: (numpy array) replica rows with an event
+        :param cells: (numpy array) event cell per row
+        :param delta: (int) +1 for infections, -1 for removals
+        :return: None
+        """
+        neighbours = neighbour_table[cells]
+        row_index = rows[:, None]
+
+        # add.at applies once per edge even if an index ever repeats
+        np.add.at(n_inf, (row_index, neighbours), delta)
+
+        susceptible = state[row_index, neighbours] == S_CODE
+        counts = n_inf[row_index, neighbours].clip(min=0, max=len(rate_table) - 1)
+        old_rates = rate[row_index, neighbours]
+        new_rates = np.where(susceptible, rate_table[counts], old_rates)
+
+        sum_rates[rows] += (new_rates - old_rates).sum(axis=1)
+        rate[row_index, neighbours] = new_rates
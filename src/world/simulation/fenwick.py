@@ -0,0 +1,135 @@
+import numpy as np
+
+
+def _tree_set(tree, n_leaves, index, value):
+    """
+    Set one leaf and propagate the delta up to the root.
+
+    :param tree: (numpy array) implicit binary tree
+    :param n_leaves: (int) number of leaves
+    :param index: (int) leaf index
+    :param value: (float) new leaf value
+    :return: None
+    """
+    node = n_leaves + index
+    delta = value - tree[node]
+    if delta == 0.0:
+        return
+    while node:
+        tree[node] += delta
+        node >>= 1
+
+
+def _tree_sample(tree, n_leaves, target) -> int:
+    """
+    Descend from the root to the leaf whose cumulative interval holds target.
+
+    :param tree: (numpy array) implicit binary tree
+    :param n_leaves: (int) number of leaves
+    :param target: (float) value in [0, total)
+    :return: (int) leaf index
+    """
+    node = 1
+    while node < n_leaves:
+        node *= 2
+        left = tree[node]
+        if target >= left:
+            target -= left
+            node += 1
+    return node - n_leaves
+
+
+try:
+    from numba import njit
+    _tree_set = njit(cache=True)(_tree_set)
+    _tree_sample = njit(cache=True)(_tree_sample)
+except ImportError:
+    pass
+
+
+class RateTree:
+    """
+    Numpy-backed binary segment tree of per-cell infection rates.
+    Point updates and weighted sampling are both O(log N), replacing the
+    O(N) CDF rebuild per event; the root holds the total rate.
+
+    Attributes:
+        _n_leaves: (int) number of leaves (next power of two >= n_cells)
+        _tree: (numpy array of float) implicit binary tree; leaf i lives at _n_leaves + i
+    """
+
+    def __init__(self, n_cells: int):
+        """
+        Constructor for RateTree.
+
+        :param n_cells: (int) number of cells whose rates are tracked
+        """
+        n_leaves = 1
+        while n_leaves < n_cells:
+            n_leaves *= 2
+        self._n_leaves = n_leaves
+        self._tree = np.zeros(2 * n_leaves, dtype=float)
+
+    def clear(self):
+        """
+        Zero every rate.
+
+        :return: None
+        """
+        self._tree.fill(0.0)
+
+    def rebuild(self, values: np.ndarray):
+        """
+        Rebuild the whole tree from a dense vector of rates in O(N),
+        level by level with vectorized sums.
+
+        :param values: (numpy array) rate per cell
+        :return: None
+        """
+        tree = self._tree
+        n_leaves = self._n_leaves
+        tree[n_leaves:n_leaves + len(values)] = values
+        tree[n_leaves + len(values):] = 0.0
+        size = n_leaves
+        while size > 1:
+            size //= 2
+            children = tree[2 * size:4 * size]
+            tree[size:2 * size] = children[0::2] + children[1::2]
+
+    @property
+    def total(self) -> float:
+        """
+        Sum of all rates (the tree root).
+
+        :return: (float) total rate
+        """
+        return float(self._tree[1])
+
+    def get(self, index: int) -> float:
+        """
+        Current rate of one cell.
+
+        :param index: (int) flat cell index
+        :return: (float) rate stored at that leaf
+        """
+        return float(self._tree[self._n_leaves + index])
+
+    def set(self, index: int, value: float):
+        """
+        Set one cell's rate, propagating the change up to the root.
+
+        :param index: (int) flat cell index
+        :param value: (float) new rate
+        :return: None
+        """
+        _tree_set(self._tree, self._n_leaves, index, value)
+
+    def sample(self, target: float) -> int:
+        """
+        Find the leaf whose cumulative-rate interval contains the target,
+        by descending from the root.
+
+        :param target: (float) value in [0, total)
+        :return: (int) flat cell index of the sampled leaf
+        """
+        return int(_tree_sample(self._tree, self._n_leaves, target))
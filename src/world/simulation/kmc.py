@@ -1,13 +1,123 @@
+import math
 from logging import getLogger
 
 import numpy as np
 
 from src.world.cell import State
+from src.world.cell.state import I_CODE
 from src.world.network.base import Network
 from src.world.simulation.base import Simulation
+from src.world.simulation.rng import get_rng
 
 logger = getLogger(__name__)
 
+# Below this many threatened cells, a single multinomial draw beats the tree
+SMALL_THREAT_COUNT = 64
+
+
+def _run_kmc(state, n_inf, rate, remove_at, neighbour_table, rate_table, alpha, beta,
+             infection_time, t_start, t_end, event_times, event_types, event_cells):
+    """
+    Run the whole KMC event loop directly on the state arrays, logging each
+    event, and only returning to Python when done. Jitted with numba when
+    available.
+
+    :param state, n_inf, rate, remove_at: (numpy arrays) network state arrays
+    :param neighbour_table: ((N, degree) numpy array) fixed-degree topology
+    :param rate_table: (numpy array) precomputed rate per neighbour count
+    :param alpha, beta: (float) disease parameters (fallback beyond the table)
+    :param infection_time: (float) duration of infection
+    :param t_start, t_end: (float) start time and cutoff
+    :param event_times, event_types, event_cells: (numpy arrays) preallocated event log
+    :return: (tuple) final time, number of events logged, 1 if extinct else 0
+    """
+    n_cells = len(state)
+    time = t_start
+    max_events = len(event_times)
+    n_events = 0
+
+    total = 0.0
+    n_infected = 0
+    for i in range(n_cells):
+        total += rate[i]
+        if state[i] == 1:
+            n_infected += 1
+
+    while n_infected > 0 and n_events < max_events:
+
+        if total > 1e-10:
+            delta_t = -np.log(1.0 - np.random.random()) / total
+        else:
+            delta_t = np.inf
+
+        next_remove_time = np.inf
+        next_remove_cell = -1
+        for i in range(n_cells):
+            if state[i] == 1 and remove_at[i] < next_remove_time:
+                next_remove_time = remove_at[i]
+                next_remove_cell = i
+
+        # Remove event occurs before infection event?
+        if time + delta_t >= next_remove_time:
+            if next_remove_time > t_end:
+                break
+            time = next_remove_time
+            cell = next_remove_cell
+            state[cell] = 2
+            remove_at[cell] = np.inf
+            n_infected -= 1
+            delta = -1
+            event_type = 1
+
+        # Infection event occurs
+        else:
+            if time + delta_t > t_end:
+                break
+            time += delta_t
+            target = np.random.random() * total
+            running = 0.0
+            cell = n_cells - 1
+            for i in range(n_cells):
+                running += rate[i]
+                if running >= target:
+                    cell = i
+                    break
+            total -= rate[cell]
+            rate[cell] = 0.0
+            state[cell] = 1
+            remove_at[cell] = time + infection_time
+            n_infected += 1
+            delta = 1
+            event_type = 0
+
+        for k in range(neighbour_table.shape[1]):
+            j = neighbour_table[cell, k]
+            n_inf[j] += delta
+            if state[j] == 0:
+                count = n_inf[j]
+                if count < len(rate_table):
+                    new_rate = rate_table[count]
+                else:
+                    new_rate = count * (alpha + beta * (count - 1))
+                    if new_rate < 0.0:
+                        new_rate = 0.0
+                total += new_rate - rate[j]
+                rate[j] = new_rate
+
+        event_times[n_events] = time
+        event_types[n_events] = event_type
+        event_cells[n_events] = cell
+        n_events += 1
+
+    return time, n_events, 1 if n_infected == 0 else 0
+
+
+try:
+    from numba import njit
+    _run_kmc = njit(cache=True)(_run_kmc)
+except ImportError:
+    pass
+
 
 class KineticMonteCarloSimulation(Simulation):
 
@@ -21,27 +131,90 @@ class KineticMonteCarloSimulation(Simulation):
         :return: None
         """
 
-        if len(network.infected_cells) == 0:
+        if network._bucket_size[I_CODE] == 0:
             network.extinct = True
             return
 
-        # Sample a random time for the next step to happen
-        if network.sum_events_rates > 1e-10:
-            random_u = np.random.uniform()
-            delta_t = (1.0 / network.sum_events_rates) * np.log(1.0 / random_u)
+        # Bind the hot lookups once; each is a property behind attribute dispatch
+        rng = get_rng()
+        sum_rates = network.sum_events_rates
+        next_remove_time = network.next_remove_time
+
+        # Sample a random time for the next step to happen;
+        # log(1/u) == -log(u), and math.log skips the ufunc dispatch on scalars
+        if sum_rates > 1e-10:
+            delta_t = -math.log(1.0 - rng.random()) / sum_rates
         else:
             delta_t = np.inf
 
         # Remove event occurs before infection event?
-        if network.time + delta_t >= network.next_remove_time:
-            network.time = network.next_remove_time
-            cell_to_remove = network.infected_cells[0]
+        if network.time + delta_t >= next_remove_time:
+            network.time = next_remove_time
+            cell_to_remove = network.next_remove_cell
             cell_to_remove.state = State.R
 
         # Infection event occurs
         else:
             network.time = network.time + delta_t
-            threatened_rates = [cell.rate_of_getting_infected for cell in network.threatened_cells]
-            normalised_rates = np.array(threatened_rates) / network.sum_events_rates
-            cell_to_infect = np.random.choice(network.threatened_cells, p=normalised_rates)
+
+            # Polyalgorithm: one multinomial draw beats the tree descent for
+            # small threatened populations (early/late in an outbreak)
+            if network._threatened_size < SMALL_THREAT_COUNT:
+                indices = network.threatened_indices
+                rates = network.rate_arr[indices]
+                chosen = int(indices[rng.multinomial(1, rates / rates.sum()).argmax()])
+
+            else:
+                # O(log N) weighted draw by descending the rate tree
+                tree = network._rate_tree
+                random_target = rng.random() * tree.total
+                chosen = tree.sample(random_target)
+
+                if chosen >= len(network.state_arr) or network.is_safe_arr[chosen]:
+                    # Float drift in the tree can (very rarely) misroute the
+                    # descent into the zero-padded tail or onto a zero-rate
+                    # leaf (safe or non-susceptible); fall back to the exact CDF
+                    cdf = network.threat_cdf
+                    position = int(np.searchsorted(cdf, random_target, side='right'))
+                    chosen = network.threatened_indices[min(position, len(cdf) - 1)]
+
+            cell_to_infect = network._cells[chosen]
             cell_to_infect.state = State.I
+
+    @staticmethod
+    def step_many(network: Network, until_time: float = np.inf):
+        """
+        Advance the network by many events in one kernel call, amortizing the
+        per-step Python overhead. Events are applied directly to the state
+        arrays; derived structures are rebuilt once at the end, and the event
+        log is returned for post-processing (e.g. into Snapshots).
+
+        :param network: (Network) network to update
+        :param until_time: (float) stop once the next event would pass this time
+        :return: (dict of numpy arrays) times, types (0=infection, 1=removal) and cells of the events
+        """
+        from src.world.simulation.batch import BatchKineticMonteCarloSimulation
+        neighbour_table = BatchKineticMonteCarloSimulation.neighbour_table(network)
+
+        # In SIR every cell fires at most twice (infection then removal)
+        max_events = 2 * len(network.state_arr) + 1
+        event_times = np.empty(max_events, dtype=float)
+        event_types = np.empty(max_events, dtype=np.int8)
+        event_cells = np.empty(max_events, dtype=np.int64)
+
+        time, n_events, extinct = _run_kmc(
+            network.state_arr, network.n_inf_arr, network.rate_arr, network.remove_at_arr,
+            neighbour_table, network._rate_table, network.ALPHA, network.BETA,
+            network.INFECTION_TIME, float(network.time), float(until_time),
+            event_times, event_types, event_cells,
+        )
+
+        network.time = float(time)
+        network.extinct = bool(extinct)
+        network._resync_after_bulk()
+
+        return {
+            'times': event_times[:n_events],
+            'types': event_types[:n_events],
+            'cells': event_cells[:n_events],
+        }
@@ -1,6 +1,11 @@
+from logging import getLogger
+
 import numpy as np
 
 from src.world.network.base import Network
+from src.world.simulation.rng import get_rng
+
+logger = getLogger(__name__)
 
 
 def rewire_network(network: Network, probability: float):
@@ -12,20 +17,26 @@ def rewire_network(network: Network, probability: float):
     :return: None
     """
 
-    n_cells = len(network._cells)
-
-    # TODO handle this better
-    n_cells_to_rewire = np.random.binomial(n_cells, probability)
-    rewire_pair_idxs = np.random.choice(range(n_cells), size=(n_cells_to_rewire, 2))
-    failed_rewire_pairs = np.where(rewire_pair_idxs[:, 0] == rewire_pair_idxs[:, 1])[0]
-
-    if len(failed_rewire_pairs) > 0:
-        print('WARNING: %d node rewired to self' % (len(failed_rewire_pairs)))
+    cells = network._cells
+    n_cells = len(cells)
 
-    for from_index, to_index in rewire_pair_idxs:
-        _from = network._cells[from_index]
-        _to = network._cells[to_index]
-        success = _from.rewire_to_neighbour(_to)
+    rng = get_rng()
 
-        if not success:
-            print('WARNING: failed rewiring due to no neighbours')
+    # TODO handle this better
+    n_cells_to_rewire = rng.binomial(n_cells, probability)
+
+    # Resample self-loop pairs so the drawn count is honoured exactly
+    pairs = np.empty((0, 2), dtype=np.intp)
+    while len(pairs) < n_cells_to_rewire:
+        extra = rng.integers(0, n_cells, size=(n_cells_to_rewire - len(pairs) + 8, 2), dtype=np.intp)
+        extra = extra[extra[:, 0] != extra[:, 1]]
+        pairs = np.concatenate([pairs, extra])
+    pairs = pairs[:n_cells_to_rewire]
+
+    n_failed = 0
+    for from_index, to_index in pairs:
+        if not cells[from_index].rewire_to_neighbour(cells[to_index]):
+            n_failed += 1
+
+    if n_failed > 0:
+        logger.warning('%d rewirings failed due to no neighbours', n_failed)
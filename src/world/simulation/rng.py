@@ -0,0 +1,25 @@
+import numpy as np
+
+# Shared Generator (PCG64) for the simulation hot paths; noticeably faster
+# than the legacy np.random module on scalar draws
+_generator = np.random.default_rng()
+
+
+def get_rng() -> np.random.Generator:
+    """
+    The Generator used by the simulation hot paths.
+
+    :return: (Generator) the current shared generator
+    """
+    return _generator
+
+
+def seed_rng(seed: int = None):
+    """
+    Reseed the shared simulation Generator, for reproducible runs.
+
+    :param seed: (int) seed value, or None for fresh entropy
+    :return: None
+    """
+    global _generator
+    _generator = np.random.default_rng(seed)
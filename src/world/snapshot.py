@@ -1,21 +1,50 @@
+import numpy as np
+
 from src.world.network.base import Network
 
 
 class Snapshot:
     """
     A snapshot in time of a network.
+    Per-cell fields are stored as parallel numpy arrays rather than Python
+    lists, so downstream reductions and plots run as C loops.
 
     Attributes:
         time: (float) current time of the network
-        locations: (list of tuples) locations of all cells in the network
-        states: (list of str) state of all cells in the network
-        infected_times: (list float) infection times of all cells in the network
+        xs: (numpy array of float32) x location of all cells in the network
+        ys: (numpy array of float32) y location of all cells in the network
+        states: (numpy array of int8) state code of all cells in the network
+        infected_times: (numpy array of float32) infection times of all cells (inf if never infected)
     """
     def __init__(self, network: Network):
         self.time = network.time
-        self.locations = network.apply_map(lambda c: (c.x, c.y))
-        self.states = network.apply_map(lambda c: c.state)
-        self.infected_times = [
-            None if remove_at_time is None else (remove_at_time - network.INFECTION_TIME)
-            for remove_at_time in network.apply_map(lambda c: c.remove_at_time)
-        ]
+
+        # Coordinates never change, so share the network's preallocated arrays
+        self.xs = network.x_arr
+        self.ys = network.y_arr
+        self.states = network.state_arr.astype(np.int8)
+
+        # Single vectorized subtraction; inf marks cells with no infection yet
+        remove_at = network.apply_map_array('remove_at')
+        self.infected_times = (remove_at - float(network.INFECTION_TIME)).astype(np.float32)
+
+    @property
+    def locations(self) -> np.ndarray:
+        """
+        All cell locations, packed as one (N, 2) array.
+
+        :return: (numpy array) x and y location of each cell
+        """
+        return np.column_stack((self.xs, self.ys))
+
+    def __copy__(self) -> 'Snapshot':
+        """
+        Cheap shallow copy sharing the per-cell fields.
+        Interval snapshots differ only by time, so the field arrays
+        (which are never mutated) can be shared rather than deep-copied.
+
+        :return: (Snapshot) shallow copy of this snapshot
+        """
+        snapshot = object.__new__(Snapshot)
+        snapshot.__dict__ = self.__dict__.copy()
+        return snapshot